@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import sys
+
 import click
 import amazonscraper
 
@@ -40,14 +42,47 @@ https://www.amazon.com/s/field-keywords=python%2Bscraping',
     help='Save the html page to the current folder with the specified name',
     default="",
 )
-def main(keywords, url, csvseparator, maxproductnb, outputhtml):
-    """ Search for products on Amazon, and extract it as CSV """
-    products = amazonscraper.search(
-                                    keywords=keywords,
-                                    search_url=url,
-                                    max_product_nb=maxproductnb)
+@click.option(
+    '--outputformat', '-f',
+    type=click.Choice(['csv', 'jsonl', 'parquet']),
+    help='Format of the products : csv, jsonl (JSON lines) or parquet \
+(requires pyarrow and --outputfile)',
+    default="csv",
+)
+@click.option(
+    '--outputfile', '-O',
+    type=str,
+    help='Save the products to the specified file instead of printing them',
+    default="",
+)
+def main(keywords, url, csvseparator, maxproductnb, outputhtml,
+         outputformat, outputfile):
+    """ Search for products on Amazon, and extract it as CSV, JSON lines
+    or Parquet. The CSV and JSON lines are written page by page """
+    if outputformat == "parquet" and outputfile == "":
+        raise click.UsageError("--outputformat parquet requires --outputfile")
+
+    output = outputfile if outputfile != "" else sys.stdout
+    if outputformat == "csv":
+        writer = amazonscraper.CSVWriter(output, separator=csvseparator)
+    elif outputformat == "jsonl":
+        writer = amazonscraper.JSONLinesWriter(output)
+    else:
+        writer = None
+
+    try:
+        products = amazonscraper.search(
+                                        keywords=keywords,
+                                        search_url=url,
+                                        max_product_nb=maxproductnb,
+                                        keep_html_pages=1 if outputhtml else 'none',
+                                        writer=writer)
+    finally:
+        if writer is not None:
+            writer.close()
 
-    print(products.csv(separator=csvseparator))
+    if outputformat == "parquet":
+        products.to_parquet(outputfile)
 
     if (outputhtml != ""):
         with open(outputhtml, "w") as f:
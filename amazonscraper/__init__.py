@@ -3,12 +3,37 @@
 useful information (title, ratings, number of reviews).
 """
 from builtins import object
-import csv
-from amazonscraper.client import Client
+import io
+import itertools
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from amazonscraper import arrow
+from amazonscraper.client import AmazonClient
+from amazonscraper.cache import ResponseCache
+from amazonscraper.checkpoint import Checkpoint
+from amazonscraper.columnar import ProductTable
+from amazonscraper.dedup import AsinIndex
+from amazonscraper.metrics import InMemorySink, LoggingSink, PrometheusSink
+from amazonscraper.aio import AsyncAmazonClient
+from amazonscraper.pipeline import ParsingPool, PipelinedAmazonClient
+from amazonscraper.replay import PageArchive
+from amazonscraper.transport import HTTP2Transport, Transport
+from amazonscraper.writers import CSVWriter, JSONLinesWriter
 
 
 __version__ = '0.1.2'  # Should be the same in setup.py
 
+# Fields of the products extracted by AmazonClient, stored in Product slots
+_PRODUCT_FIELDS = ('title', 'rating', 'review_nb', 'img', 'url', 'asin',
+                   'prices_per_unit', 'units', 'prices_main')
+_PRODUCT_FIELD_SET = frozenset(_PRODUCT_FIELDS)
+
+_DEFAULT_WORKERS = 8
+# Queries submitted ahead of the workers, per worker
+_QUERIES_AHEAD_PER_WORKER = 2
+
+SearchResult = namedtuple('SearchResult', ['query', 'products', 'error'])
+
 
 class Products(object):
     """Class of the products"""
@@ -45,55 +70,253 @@ class Products(object):
         (ex : products[1]) """
         return self.products[key]
 
-    def csv(self, file_name, separator=","):
-        """ Returns a CSV string with the product info
+    def csv(self, file_name=None, separator=","):
+        """ Writes the products to the CSV file file_name, with a header
+        of the field names, or returns a CSV string without file_name
         >>> p = Products([{'title':'Book title', 'rating': '4.2',\
 'review_nb': '15', 'url':'http://www.amazon.com/book', 'asin':'A12345'}])
         >>> p.csv()
-        'Product title,Rating,Number of customer reviews,\
-Product URL,Image URL,ASIN\\n"Book title",4.2,15,http://www.amazon.com/book,,A12345'
+        'title,rating,review_nb,url,asin\\nBook title,4.2,15,http://www.amazon.com/book,A12345\\n'
 
         >>> print(p.csv(separator=";"))
-        Product title;Rating;Number of customer reviews;Product URL;Image URL;ASIN
-        "Book title";4,2;15;http://www.amazon.com/book;;A12345
+        title;rating;review_nb;url;asin
+        Book title;4.2;15;http://www.amazon.com/book;A12345
+        <BLANKLINE>
 
         >>> p2 = Products()
         >>> p2.csv()
-        'Product title,Rating,Number of customer reviews,Product URL,Image URL,ASIN'
+        ''
         """
+        if file_name is None:
+            output = io.StringIO()
+            self._write(CSVWriter(output, separator=separator))
+            return output.getvalue()
+        with CSVWriter(file_name, separator=separator) as writer:
+            self._write(writer)
 
-        if not self.products:
-            return
+    def jsonl(self, file_name):
+        """ Writes the products to the JSON lines file file_name """
+        with JSONLinesWriter(file_name) as writer:
+            self._write(writer)
 
-        with open(file_name, 'w') as csvfile:
-            writer = csv.writer(csvfile, delimiter=separator)
+    def _write(self, writer):
+        """ Writes the products with a ProductWriter """
+        writer.write_page([product.product for product in self.products])
 
-            header = list(self.products[0].product.keys())
-            writer.writerow(header)
+    def to_arrow(self):
+        """ Returns an Apache Arrow table of the products, with typed
+        columns (requires pyarrow) """
+        return arrow.to_arrow(self.products)
 
-            for product in self.products:
-                writer.writerow(list(product.product.values()))
+    def to_parquet(self, path, compression='snappy'):
+        """ Writes the products to a Parquet file (requires pyarrow) """
+        arrow.to_parquet(self.products, path, compression=compression)
 
 class Product(object):
-    """Class of a product"""
+    """Class of a product, with the fields extracted by AmazonClient:
+    title (str), rating (float), review_nb (int), img, url and asin (str),
+    prices_per_unit, units and prices_main (float, or str for several
+    values). Missing fields are NaN, or "" if not extracted at all.
+    The fields are slots, so that millions of products fit in memory;
+    other fields (registered extractors) are kept in a dict.
+    >>> product = Product({'title': 'Book title', 'badge': 'Best seller'})
+    >>> product.title, product.badge, product.rating
+    ('Book title', 'Best seller', '')
+    >>> product.product
+    {'title': 'Book title', 'badge': 'Best seller'}
+    """
+    __slots__ = _PRODUCT_FIELDS + ('_extra_fields',)
+
     def __init__(self, product_dict={}):
         self.product = product_dict
 
+    @property
+    def product(self):
+        """The fields of the product, as a dict (a copy)."""
+        product_dict = {}
+        for field in _PRODUCT_FIELDS:
+            try:
+                product_dict[field] = object.__getattribute__(self, field)
+            except AttributeError:  # Not extracted
+                pass
+        if self._extra_fields:
+            product_dict.update(self._extra_fields)
+        return product_dict
+
+    @product.setter
+    def product(self, product_dict):
+        # Replaces all the fields: the ones missing from product_dict are unset
+        for field in _PRODUCT_FIELDS:
+            if field not in product_dict:
+                try:
+                    object.__delattr__(self, field)
+                except AttributeError:  # Not set
+                    pass
+        self._extra_fields = None
+        for field, value in product_dict.items():
+            if field in _PRODUCT_FIELD_SET:
+                object.__setattr__(self, field, value)
+            else:
+                if self._extra_fields is None:
+                    self._extra_fields = {}
+                self._extra_fields[field] = value
+
+    def __reduce__(self):
+        # The default pickling would store "" for the fields not extracted
+        return (Product, (self.product,))
+
     def __getattr__(self, attr):
-        """ Method to access a dictionnary key as an attribute
-        (ex : product.title) """
-        return self.product.get(attr, "")
+        """ Method to access the fields which were not extracted, or of
+        registered extractors (ex : product.badge) """
+        if attr.startswith('__') or attr == '_extra_fields':
+            raise AttributeError(attr)
+        if self._extra_fields:
+            return self._extra_fields.get(attr, "")
+        return ""
 
 
-def search(keywords="", search_url="", max_product_nb=100):
-    """Function to get the list of products from amazon"""
-    amz = Client()
+def search(keywords="", search_url="", max_product_nb=100, prefetch=False,
+           parser=None, parsing_pool=None, keep_html_pages='all', cache=None,
+           archive=None, replay=False, metrics=None, transport=None,
+           streaming=False, checkpoint=None, writer=None, dedup=None):
+    """Function to get the list of products from amazon.
+    With `prefetch`, the next result page is downloaded while the current
+    one is parsed. `parser` is the HTML parser backend ('beautifulsoup'
+    by default, 'lxml' or 'selectolax'). With a `parsing_pool` (a
+    ParsingPool shared by the searches), the pages are parsed in worker
+    processes. `keep_html_pages` is the retention policy of the raw pages:
+    'all', 'none', the number of last pages to keep, or 'disk'. With a
+    `cache` (a ResponseCache), the valid pages are read from and stored on
+    disk. With an `archive` (a PageArchive), the answers are recorded in
+    it, or with `replay`, read back from it instead of the network.
+    `metrics` is a sink (InMemorySink, LoggingSink, PrometheusSink...)
+    receiving the timings of the requests and of the parsing. Share a
+    `transport` (a Transport) between the searches to reuse its connections.
+    With `streaming`, the pages are read by chunks, and dropped as soon as
+    their head shows a Robot Check or block page. With a `checkpoint` (a
+    Checkpoint), the products are saved after each page, and a failed
+    search run again resumes from the last page saved. With a `writer` (a
+    CSVWriter or JSONLinesWriter), the products of each page are written
+    to its file as soon as the page is parsed. With `dedup` (an AsinIndex),
+    the products whose ASIN was already seen are dropped, and do not count
+    toward max_product_nb"""
+    if parsing_pool is not None:
+        amz = PipelinedAmazonClient(parsing_pool, parser=parser,
+                                    keep_html_pages=keep_html_pages, cache=cache,
+                                    archive=archive, replay=replay, metrics=metrics,
+                                    session=transport, streaming=streaming,
+                                    checkpoint=checkpoint, writer=writer,
+                                    dedup=dedup)
+    else:
+        amz = AmazonClient(parser=parser, keep_html_pages=keep_html_pages,
+                           cache=cache, archive=archive, replay=replay,
+                           metrics=metrics, session=transport, streaming=streaming,
+                           checkpoint=checkpoint, writer=writer, dedup=dedup)
     product_dict_list = amz._get_products(
         keywords=keywords,
         search_url=search_url,
-        max_product_nb=max_product_nb)
+        max_product_nb=max_product_nb,
+        prefetch=prefetch)
+    products = Products(product_dict_list)
+    products.html_pages = amz.html_pages
+    products.last_html_page = amz.html_pages.last
+
+    return products
+
+
+def iter_search(keywords="", search_url="", max_product_nb=100, parser=None,
+                cache=None, archive=None, replay=False, metrics=None,
+                transport=None, streaming=False, writer=None, dedup=None):
+    """Generator version of search(), yielding each product as soon as its
+    page is parsed. Neither the products nor the pages are kept, so the
+    memory use does not grow with max_product_nb. With a `writer`, the
+    products of each page are also written to its file. With `dedup` (an
+    AsinIndex), the products already seen are dropped"""
+    amz = AmazonClient(parser=parser, cache=cache, archive=archive,
+                       replay=replay, metrics=metrics, session=transport,
+                       streaming=streaming, writer=writer, dedup=dedup)
+    for product_dict in amz._iter_products(
+            keywords=keywords,
+            search_url=search_url,
+            max_product_nb=max_product_nb):
+        yield Product(product_dict)
+
+
+def search_many(queries, workers=_DEFAULT_WORKERS, max_product_nb=100,
+                parser=None, keep_html_pages='none', cache=None, metrics=None,
+                transport=None, rate_limiter=None, streaming=False, writer=None,
+                dedup=None):
+    """Run the searches of many queries (keywords or search URLs) in a pool
+    of `workers` threads, sharing one Transport (by default, one keeping a
+    connection per worker alive) and one rate limiter. A SearchResult(query, products,
+    error) is yielded as soon as each search finishes, in any order; error
+    is the exception raised by a failed search, whose products are then the
+    ones of the pages parsed before the failure.
+    The queries can be a generator: only a few are read ahead of the
+    workers. Only the last HTML page of each search is kept by default.
+    A `writer` receives the products of all the searches, page by page.
+    With `dedup` (an AsinIndex), each product is kept by the first search
+    finding it only, even if that search fails later."""
+    if transport is None:
+        transport = Transport(pool_maxsize=workers)
+    client_kwargs = dict(parser=parser, keep_html_pages=keep_html_pages, cache=cache,
+                         metrics=metrics, session=transport, rate_limiter=rate_limiter,
+                         streaming=streaming, writer=writer, dedup=dedup)
+    queries = iter(queries)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {executor.submit(_search_query, query, max_product_nb, client_kwargs): query
+                   for query in itertools.islice(queries, workers * _QUERIES_AHEAD_PER_WORKER)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                query = pending.pop(future)
+                for next_query in itertools.islice(queries, 1):
+                    pending[executor.submit(_search_query, next_query, max_product_nb, client_kwargs)] = next_query
+                yield SearchResult(query, *future.result())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _search_query(query, max_product_nb, client_kwargs):
+    """Search a query of search_many() (keywords or a search URL), and
+    return its products and the exception raised (None if it succeeded)."""
+    amz = AmazonClient(**client_kwargs)
+    search_url = query if query.startswith(('http://', 'https://')) else ""
+    error = None
+    try:
+        amz._get_products(
+            keywords="" if search_url else query,
+            search_url=search_url,
+            max_product_nb=max_product_nb)
+    except Exception as exception:
+        # The products kept so far are returned: with a shared AsinIndex,
+        # the other searches drop them as duplicates
+        error = exception
+    products = Products(amz.product_dict_list)
+    products.html_pages = amz.html_pages
+    products.last_html_page = amz.html_pages.last
+    return products, error
+
+
+async def asearch(keywords="", search_url="", max_product_nb=100,
+                  session=None, semaphore=None, parser=None,
+                  keep_html_pages='all', cache=None, metrics=None,
+                  streaming=False):
+    """Coroutine version of search(), to run many searches concurrently.
+    Pass the same aiohttp `session` and asyncio `semaphore` to all the
+    searches to share one connection pool and cap the requests in flight"""
+    async with AsyncAmazonClient(session=session, semaphore=semaphore,
+                                 parser=parser,
+                                 keep_html_pages=keep_html_pages,
+                                 cache=cache, metrics=metrics,
+                                 streaming=streaming) as amz:
+        product_dict_list = await amz._get_products(
+            keywords=keywords,
+            search_url=search_url,
+            max_product_nb=max_product_nb)
     products = Products(product_dict_list)
     products.html_pages = amz.html_pages
-    products.last_html_page = amz.html_pages[-1]
+    products.last_html_page = amz.html_pages.last
 
     return products
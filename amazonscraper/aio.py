@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+from amazonscraper.client import (AmazonClient, StatusCodeError, _MAX_TRIAL_REQUESTS, _STREAM_CHUNK_SIZE,
+                                  _THROTTLING_STATUS_CODES, _is_invalid_page_head)
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency
+    aiohttp = None
+
+# Max number of requests in flight for one client (or one shared semaphore)
+_DEFAULT_MAX_CONCURRENT_REQUESTS = 10
+
+
+class AsyncAmazonClient(AmazonClient):
+    """Asyncio version of AmazonClient, sending its requests with aiohttp.
+
+    Many clients can run concurrently on the same event loop. To bound the
+    total number of requests in flight, give them the same `semaphore` (and
+    the same aiohttp `session` to share its connection pool).
+    """
+    def __init__(self, session=None, semaphore=None,
+                 max_concurrent_requests=_DEFAULT_MAX_CONCURRENT_REQUESTS, **kwargs):
+        if aiohttp is None:
+            raise ImportError('AsyncAmazonClient requires aiohttp (pip install aiohttp)')
+        if kwargs.get('archive') is not None:
+            # The archives are recorded and replayed by requests sessions
+            raise ValueError('AsyncAmazonClient does not support page archives')
+        super().__init__(**kwargs)
+        # aiohttp sessions must be created inside the event loop, so the
+        # default one is only opened on the first request
+        self.session = session
+        self._owns_session = session is None
+        self.semaphore = semaphore or asyncio.Semaphore(max_concurrent_requests)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the aiohttp session if it was opened by the client."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _get(self, url):
+        """Send a GET request with appropriate headers, return the page text."""
+        if self.cache is not None:
+            text = self.cache.get(url, self.headers)
+            if text is not None:
+                return text
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        domain = self.headers['Host']
+        delay = self.rate_limiter.reserve(domain)
+        await asyncio.sleep(delay)
+        async with self.semaphore:
+            start = time.perf_counter() if self.metrics is not None else None
+            try:
+                async with self.session.get(url, headers=self.headers) as response:
+                    body = await (self._read_streamed(response) if self.streaming else response.read())
+                    status = response.status
+                    # A streamed body may be cut in the middle of a character
+                    errors = 'replace' if self.streaming else 'strict'
+                    text = body.decode(response.get_encoding(), errors) if status == 200 else ''
+            except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError):
+                if start is not None:
+                    self.metrics.observe('request_seconds', time.perf_counter() - start, answer='error')
+                raise
+        if status != 200:
+            throttled = status in _THROTTLING_STATUS_CODES
+            if throttled:
+                self.rate_limiter.on_throttled(domain)
+            if start is not None:
+                self._observe_request(start, delay, 'throttled' if throttled else 'error', body)
+            raise StatusCodeError(status, url)
+        if self._check_page(text):
+            answer = 'page'
+            self.rate_limiter.on_success(domain)
+            if self.cache is not None:
+                self.cache.put(url, self.headers, text)
+        elif self._is_throttling_page(text):
+            answer = 'throttled'
+            self.rate_limiter.on_throttled(domain)
+        else:
+            answer = 'invalid'
+        if start is not None:
+            self._observe_request(start, delay, answer, body)
+        return text
+
+    async def _read_streamed(self, response):
+        """Read the body of a response by chunks, and stop as soon as its
+        head shows an invalid page (Robot Check...)."""
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(_STREAM_CHUNK_SIZE):
+            body += chunk
+            if _is_invalid_page_head(body, len(chunk)):
+                response.close()
+                break
+        return bytes(body)
+
+    async def _get_page_html(self, search_url):
+        """Retrieve the HTML page and handle retries if necessary."""
+        start = time.perf_counter() if self.metrics is not None else None
+        trials = 0
+        while trials < _MAX_TRIAL_REQUESTS:
+            trials += 1
+            try:
+                html_content = await self._get(search_url)
+                if self._check_page(html_content):
+                    if start is not None:
+                        self.metrics.observe('page_seconds', time.perf_counter() - start)
+                        self.metrics.observe('page_retries', trials - 1)
+                    return html_content
+            except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError):
+                pass
+            self._change_user_agent()
+            if trials == _MAX_TRIAL_REQUESTS:  # No retry to wait for
+                break
+            delay = self.rate_limiter.backoff_delay(trials)
+            if start is not None:
+                self.metrics.observe('backoff_seconds', delay)
+            await asyncio.sleep(delay)
+        raise ValueError('No valid pages found!')
+
+    async def _get_products(self, keywords="", search_url="", max_product_nb=100):
+        """Get products from Amazon based on search keywords.
+        With a checkpoint, the crawl resumes from the last page saved."""
+        if not search_url:
+            search_url = self._get_search_url(keywords)
+        self._update_headers(search_url)
+        search_url = self._resume_checkpoint(search_url)
+        while search_url and len(self.product_dict_list) < max_product_nb:
+            page = await self._get_page_html(search_url)
+            self.html_pages.append(page)
+            search_url = self._extract_page(page, max_product_nb, search_url)
+        return self.product_dict_list
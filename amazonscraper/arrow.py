@@ -0,0 +1,116 @@
+""" Export of the products to Apache Arrow tables and Parquet files.
+
+The fields are written with their types instead of as CSV text: the rating
+as a float, the number of reviews as an integer, and the prices and units
+as lists (the extractors join several prices found for a product in a
+string). The missing values are nulls.
+"""
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is an optional dependency
+    pa = None
+
+_LIST_SEPARATOR = ', '  # Separator of the values joined by the prices extractor
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError('The Arrow and Parquet export requires pyarrow (pip install pyarrow)')
+
+
+def schema():
+    """Return the Arrow schema of the fields extracted by AmazonClient."""
+    _require_pyarrow()
+    return pa.schema([
+        ('title', pa.string()),
+        ('rating', pa.float64()),
+        ('review_nb', pa.int64()),
+        ('img', pa.string()),
+        ('url', pa.string()),
+        ('asin', pa.string()),
+        ('prices_per_unit', pa.list_(pa.float64())),
+        ('units', pa.list_(pa.string())),
+        ('prices_main', pa.list_(pa.float64())),
+    ])
+
+
+def _is_missing(value):
+    """Return True for the values of the fields not found ("" or NaN)."""
+    return value is None or value == "" or value != value
+
+
+def _to_string(value):
+    return None if _is_missing(value) else str(value)
+
+
+def _to_float(value):
+    return None if _is_missing(value) else float(value)
+
+
+def _to_int(value):
+    """Return an integer field as an int
+    >>> _to_int('1,102'), _to_int(37.0), _to_int('')
+    (1102, 37, None)
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, str):
+        return int(value.replace(',', ''))
+    return int(float(value))
+
+
+def _to_list(value, item_type):
+    """Return the values of a field joining several ones, as a list
+    >>> _to_list('12.99, 9.99', float), _to_list(4.5, float), _to_list(float('nan'), str)
+    ([9.99, 12.99], [4.5], None)
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, str):
+        return sorted(item_type(item) for item in value.split(_LIST_SEPARATOR))
+    return [item_type(value)]
+
+
+_CONVERTERS = {
+    'title': _to_string,
+    'rating': _to_float,
+    'review_nb': _to_int,
+    'img': _to_string,
+    'url': _to_string,
+    'asin': _to_string,
+    'prices_per_unit': lambda value: _to_list(value, float),
+    'units': lambda value: _to_list(value, str),
+    'prices_main': lambda value: _to_list(value, float),
+}
+
+
+def to_arrow(products):
+    """Return an Arrow table of the products (Products, or a list of
+    Product objects or product dicts). The fields of registered extractors
+    are added after the others, with the type inferred by Arrow (strings
+    if their values have different types)."""
+    _require_pyarrow()
+    product_dicts = [getattr(product, 'product', product) for product in products]
+    table_schema = schema()
+    columns = [pa.array([_CONVERTERS[field.name](product_dict.get(field.name)) for product_dict in product_dicts],
+                        type=field.type)
+               for field in table_schema]
+    extra_fields = []
+    for product_dict in product_dicts:
+        extra_fields.extend(field for field in product_dict
+                            if field not in _CONVERTERS and field not in extra_fields)
+    for field in extra_fields:
+        values = [product_dict.get(field) for product_dict in product_dicts]
+        try:
+            column = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):  # Mixed types
+            column = pa.array([_to_string(value) for value in values], type=pa.string())
+        table_schema = table_schema.append(pa.field(field, column.type))
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=table_schema)
+
+
+def to_parquet(products, path, compression='snappy'):
+    """Write the products to the Parquet file path."""
+    pq.write_table(to_arrow(products), path, compression=compression)
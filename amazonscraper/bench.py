@@ -0,0 +1,137 @@
+""" Benchmark of the product extraction over a corpus of saved result pages.
+
+    python -m amazonscraper.bench test/search_*.html
+    python -m amazonscraper.bench --parser lxml --repeat 100 python.jsonl.gz
+
+The corpus is made of HTML files (optionally gzipped), directories of such
+files, and page archives recorded with amazonscraper.PageArchive. Each
+parser backend runs in a fresh process, and reports the pages and products
+extracted per second, the layouts matched, and the peak memory: the Python
+allocations traced by tracemalloc, and the growth of the resident set size
+(which includes the allocations of the C parsers).
+"""
+import gzip
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from amazonscraper.client import AmazonClient, LayoutCache
+from amazonscraper.parsers import PARSERS
+from amazonscraper.replay import PageArchive
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_SEARCH_URL = "https://www.amazon.com/s?k=python"
+_DEFAULT_REPEAT = 20
+
+
+def load_corpus(paths):
+    """Return the (name, html) pages of the corpus files and directories."""
+    pages = []
+    for path in paths:
+        if os.path.isdir(path):
+            pages.extend(load_corpus(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(('.html', '.html.gz', '.jsonl.gz')))))
+        elif path.endswith('.jsonl.gz'):
+            for url, records in PageArchive(path).records.items():
+                pages.extend((url, record['text']) for record in records
+                             if record['status_code'] == 200)
+        elif path.endswith('.gz'):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                pages.append((path, f.read()))
+        else:
+            with open(path, encoding='utf-8') as f:
+                pages.append((path, f.read()))
+    return pages
+
+
+def _max_rss():
+    """Return the peak resident set size of the process, in bytes (or None)."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def run_benchmark(pages, parser, repeat=_DEFAULT_REPEAT):
+    """Extract the products of every page `repeat` times with a parser
+    backend, and return the measures."""
+    amz = AmazonClient(parser=parser, layout_cache=LayoutCache())
+    amz._update_headers(_SEARCH_URL)
+    if amz.parser.name != parser:
+        raise ValueError(f"Parser '{parser}' is not available")
+    start_rss = _max_rss()
+    product_nb = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, page in pages:
+            product_nb += len(amz._parse_products(page, sys.maxsize)[0])
+    seconds = time.perf_counter() - start
+    layouts = {layout: hits // repeat for layout, hits in amz.layout_cache.hits.items()}
+
+    # Separate pass, tracemalloc slowing down the allocations
+    tracemalloc.start()
+    for _, page in pages:
+        amz._parse_products(page, sys.maxsize)
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_growth = _max_rss() - start_rss if start_rss is not None else None
+
+    page_nb = len(pages) * repeat
+    return {'parser': parser, 'pages': page_nb, 'products': product_nb,
+            'seconds': seconds, 'pages_per_sec': page_nb / seconds,
+            'products_per_sec': product_nb / seconds, 'layouts': layouts,
+            'python_peak': python_peak, 'rss_growth': rss_growth}
+
+
+def run_benchmark_in_process(pages, parser, repeat=_DEFAULT_REPEAT):
+    """Same as run_benchmark(), in a fresh process for the memory measures."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_benchmark, pages, parser, repeat).result()
+
+
+def _format_size(size):
+    return 'n/a' if size is None else f'{size / 1024 / 1024:.1f} MiB'
+
+
+@click.command()
+@click.argument('corpus', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    '--parser', '-p',
+    type=click.Choice(list(PARSERS)),
+    multiple=True,
+    help='Parser backend to benchmark (default: all the installed ones)',
+)
+@click.option(
+    '--repeat', '-r',
+    type=int,
+    default=_DEFAULT_REPEAT,
+    help='Number of extractions of each page',
+)
+def main(corpus, parser, repeat):
+    """ Benchmark the product extraction of each parser backend over saved result pages """
+    pages = load_corpus(corpus)
+    click.echo(f'{len(pages)} pages, extracted {repeat} times')
+    for name in parser or PARSERS:
+        try:
+            result = run_benchmark_in_process(pages, name, repeat)
+        except ValueError as error:
+            click.echo(f'{name:<14} skipped: {error}')
+            continue
+        layouts = ', '.join(f'{layout}: {nb}' for layout, nb in sorted(result['layouts'].items()))
+        click.echo(f"{name:<14} {result['pages_per_sec']:>9.1f} pages/s "
+                   f"{result['products_per_sec']:>10.1f} products/s   "
+                   f"peak Python {_format_size(result['python_peak'])}, "
+                   f"RSS growth {_format_size(result['rss_growth'])}   ({layouts})")
+
+
+if __name__ == "__main__":
+    main()
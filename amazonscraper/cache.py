@@ -0,0 +1,156 @@
+""" On-disk cache of the result pages, shared by the clients and processes
+using the same directory.
+
+The pages are stored gzip-compressed under the SHA-256 of their content, so
+the same page fetched through different URLs is stored once. An SQLite index
+maps each request (normalized URL and User-Agent) to its page, with the time
+it was stored (for the TTL) and last read (for the LRU eviction).
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_TTL = 3600  # seconds
+_DEFAULT_MAX_SIZE = 512 * 1024 * 1024  # bytes, compressed
+_COMPRESSION_LEVEL = 6
+# Request headers changing the page sent back by Amazon
+_KEY_HEADERS = ('User-Agent',)
+
+
+class CachedResponse(object):
+    """Response read from the cache, with the attributes of a requests
+    response used by AmazonClient"""
+    status_code = 200
+
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+
+
+class ResponseCache(object):
+    """Cache of valid result pages in `directory`. Pages older than `ttl`
+    seconds are not used, and the least recently used ones are deleted when
+    the pages take more than `max_size` bytes."""
+    def __init__(self, directory, ttl=_DEFAULT_TTL, max_size=_DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'),
+                                   timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                             'key TEXT PRIMARY KEY, digest TEXT, size INTEGER, '
+                             'stored_at REAL, accessed_at REAL)')
+
+    def close(self):
+        """Close the index database."""
+        self._db.close()
+
+    def get(self, url, headers):
+        """Return the cached page of a request, or None."""
+        key = _cache_key(url, headers)
+        with self._lock:
+            row = self._db.execute('SELECT digest, stored_at FROM responses WHERE key = ?',
+                                   (key,)).fetchone()
+            text = None
+            if row is not None and time.time() - row[1] <= self.ttl:
+                try:
+                    with gzip.open(self._path(row[0]), 'rt', encoding='utf-8') as f:
+                        text = f.read()
+                except FileNotFoundError:  # Evicted by another process
+                    pass
+            with self._db:
+                if text is None:
+                    self.misses += 1
+                    if row is not None:
+                        self._delete(key, row[0])
+                else:
+                    self.hits += 1
+                    self._db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?',
+                                     (time.time(), key))
+        return text
+
+    def put(self, url, headers, text):
+        """Store the page of a request."""
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=_COMPRESSION_LEVEL))
+            os.replace(tmp_path, path)
+        now = time.time()
+        key = _cache_key(url, headers)
+        with self._lock, self._db:
+            row = self._db.execute('SELECT digest FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[0] != digest:  # The page changed
+                self._delete(key, row[0])
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                             (key, digest, os.path.getsize(path), now, now))
+            self._evict()
+
+    def _size(self):
+        """Return the size of the stored pages, in bytes."""
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM '
+                                '(SELECT DISTINCT digest, size FROM responses)').fetchone()[0]
+
+    def stats(self):
+        """Return the hit and miss counters, and the size of the cache."""
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'size': self._size()}
+
+    def _path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], f'{digest}.html.gz')
+
+    def _evict(self):
+        """Delete the least recently used pages until the cache fits in max_size."""
+        size = self._size()
+        while size > self.max_size:
+            key, digest, page_size = self._db.execute(
+                'SELECT key, digest, size FROM responses ORDER BY accessed_at LIMIT 1').fetchone()
+            if self._delete(key, digest):
+                size -= page_size
+
+    def _delete(self, key, digest):
+        """Delete the row of a key, and the file of its digest if no other
+        row uses it. Return True if the file was deleted."""
+        self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+        if self._db.execute('SELECT 1 FROM responses WHERE digest = ?', (digest,)).fetchone() is not None:
+            return False
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+        return True
+
+
+def _cache_key(url, headers):
+    """Return the cache key of a request, the same for equivalent URLs
+    >>> _cache_key('HTTPS://www.Amazon.com/s?page=2&k=python#top', {}) == \\
+    ...     _cache_key('https://www.amazon.com/s?k=python&page=2', {})
+    True
+    """
+    key_headers = '\n'.join(f'{name}: {headers.get(name, "")}' for name in _KEY_HEADERS)
+    return hashlib.sha256(f'{_normalize_url(url)}\n{key_headers}'.encode('utf-8')).hexdigest()
+
+
+def _normalize_url(url):
+    """Return the URL with a lowercase scheme and host, sorted query
+    parameters and no fragment
+    >>> _normalize_url('HTTPS://www.Amazon.com/s?page=2&k=python#top')
+    'https://www.amazon.com/s?k=python&page=2'
+    """
+    scheme, netloc, path, query, _ = urlsplit(url)
+    return urlunsplit((scheme.lower(), netloc.lower(), path or '/',
+                       urlencode(sorted(parse_qsl(query, keep_blank_values=True))), ''))
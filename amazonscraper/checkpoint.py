@@ -0,0 +1,82 @@
+""" Checkpoints of the crawls, to resume them after a failure.
+
+A Checkpoint saves, after each page, the next page URL and the products of
+the page in a JSON lines file. When a crawl fails (after the retries of a
+page), running it again with the same checkpoint starts from the last page
+saved, with the products gathered so far:
+
+    checkpoint = Checkpoint("python.checkpoint")
+    products = amazonscraper.search("Python", max_product_nb=1000, checkpoint=checkpoint)
+"""
+import json
+import os
+import threading
+
+
+class Checkpoint(object):
+    """Pagination state of a crawl, saved in the JSON lines file `path`.
+    The first line holds the URL of the first page of the crawl, and each
+    next line the products of a page and the URL of the page after it."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self, search_url):
+        """Return the (next page URL, product dicts, number of products of
+        the next page to skip) saved for the crawl starting at search_url,
+        or None if nothing was saved."""
+        with self._lock:
+            lines = self._read_lines()
+        if not lines:
+            return None
+        if lines[0].get('search_url') != search_url:
+            raise ValueError(f"Checkpoint {self.path} belongs to the search of {lines[0].get('search_url')}, "
+                             f"not {search_url} (clear it first)")
+        if len(lines) == 1:
+            return None
+        product_dict_list = [product_dict for line in lines[1:] for product_dict in line['products']]
+        return lines[-1]['next_page_url'], product_dict_list, lines[-1].get('skip_nb', 0)
+
+    def save_page(self, search_url, next_page_url, product_dict_list, skip_nb=0):
+        """Save the products of a page of the crawl starting at search_url,
+        and the URL of the next page (None after the last one). When the
+        page was cut at max_product_nb, next_page_url is the page itself,
+        and skip_nb the number of its products already taken."""
+        with self._lock:
+            lines = []
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                lines.append({'search_url': search_url})
+            lines.append({'next_page_url': next_page_url, 'skip_nb': skip_nb, 'products': product_dict_list})
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(line) + '\n' for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """Delete the saved state."""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _read_lines(self):
+        """Return the saved lines, dropping a last line cut by a crash."""
+        if not os.path.exists(self.path):
+            return []
+        lines = []
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for raw_line in f:
+                try:
+                    lines.append(json.loads(raw_line))
+                except ValueError:
+                    break
+                if not raw_line.endswith(b'\n'):
+                    lines.pop()
+                    break
+                valid_size += len(raw_line)
+        if valid_size != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+        return lines
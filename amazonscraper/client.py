@@ -1,12 +1,23 @@
 import requests
 import re
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
 import time
 
+from amazonscraper.cache import CachedResponse
+from amazonscraper.fields import FIELD_EXTRACTORS, field_selectors
+from amazonscraper.pages import get_html_pages
+from amazonscraper.parsers import get_parser
+from amazonscraper.replay import archive_session
+from amazonscraper.throttle import NoRateLimiter, RateLimiter
+from amazonscraper.transport import HTTP2Transport
+
 # Constants
 _BASE_URL = "https://www.amazon.com/"
-_DEFAULT_BEAUTIFULSOUP_PARSER = "html.parser"
 _USER_AGENT_LIST = [
     'Mozilla/5.0 (Linux; Android 7.0; SM-A520F Build/NRD90M; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/65.0.3325.109 Mobile Safari/537.36',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_13_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.79 Safari/537.36'
@@ -51,39 +62,198 @@ CSS_SELECTORS = {
     }
 }
 
+# Cheap regex version of the 'next_page_url' selector, used to start downloading
+# the next page before the current one is parsed
+_NEXT_PAGE_URL_REGEX = re.compile(r'<li class="a-last">\s*<a[^>]*?\shref="([^"]+)"')
+_PRODUCT_ASIN_REGEX = re.compile(r'/dp/(\w{10})')
+
 # Max retry settings
 _MAX_TRIAL_REQUESTS = 5
-_WAIT_TIME_BETWEEN_REQUESTS = 1
 
+# Answers showing that Amazon is throttling us
+_THROTTLING_STATUS_CODES = (429, 503)
+_THROTTLING_KEYWORDS = ["The request could not be satisfied.", "Robot Check"]
+_INVALID_PAGE_KEYWORDS = ["Sign in for the best experience"] + _THROTTLING_KEYWORDS
 
-class AmazonClient:
+# Streaming mode: the response is read by chunks, and dropped as soon as the
+# invalid page keywords show up in its head
+_STREAM_CHUNK_SIZE = 8192
+_STREAM_HEAD_SIZE = 16384
+_INVALID_PAGE_MARKERS = [keyword.encode('utf-8') for keyword in _INVALID_PAGE_KEYWORDS]
+
+
+class LayoutCache(object):
+    """Remember which CSS_SELECTORS layout matched the last page, for each
+    (domain, User-Agent) pair, so that it is tried first on the next pages.
+    Also count how often each layout matches (hits) or not (misses)."""
     def __init__(self):
-        self.session = requests.session()
+        self.layouts = {}
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+
+    def layout_order(self, key):
+        """Return the layout names to try for key, the remembered one first."""
+        layout = self.layouts.get(key)
+        if layout is None:
+            return list(CSS_SELECTORS)
+        return [layout] + [name for name in CSS_SELECTORS if name != layout]
+
+    def record(self, key, layout, matched):
+        """Record whether the product selector of a layout matched for key."""
+        with self._lock:
+            if matched:
+                self.hits[layout] += 1
+                self.layouts[key] = layout
+            else:
+                self.misses[layout] += 1
+
+    def stats(self):
+        """Return the hits and misses of each layout."""
+        return {layout: {'hits': self.hits[layout], 'misses': self.misses[layout]}
+                for layout in CSS_SELECTORS}
+
+
+def _is_invalid_page_head(body, chunk_size):
+    """Check if the invalid page keywords show up in the head of a body
+    being read, its last chunk being chunk_size bytes long.
+    >>> _is_invalid_page_head(b'<title>Robot Check</title>', 10)
+    True
+    """
+    if len(body) - chunk_size >= _STREAM_HEAD_SIZE:  # Head already checked
+        return False
+    head = bytes(body[:_STREAM_HEAD_SIZE])
+    return any(marker in head for marker in _INVALID_PAGE_MARKERS)
+
+
+# Shared by all the clients by default
+_LAYOUT_CACHE = LayoutCache()
+_RATE_LIMITER = RateLimiter()
+
+
+class StatusCodeError(ConnectionError):
+    """Raised when the answer to a request is not a 200 OK"""
+    def __init__(self, status_code, url):
+        super().__init__(f'Status code {status_code} for url {url}')
+        self.status_code = status_code
+
+
+class AmazonClient:
+    def __init__(self, parser=None, layout_cache=None, keep_html_pages='all',
+                 rate_limiter=None, cache=None, archive=None, replay=False,
+                 metrics=None, session=None, streaming=False, checkpoint=None,
+                 writer=None, dedup=None):
+        if isinstance(session, HTTP2Transport) and (archive is not None or streaming):
+            raise ValueError('HTTP2Transport supports neither page archives nor the streaming mode')
+        if archive is not None and streaming:
+            # The archive records the whole body of every answer: the block
+            # pages would be downloaded in full again
+            raise ValueError('The page archives do not support the streaming mode')
+        # A requests session (or a Transport) can be shared by clients running in several threads
+        self.session = session if session is not None else requests.session()
+        if archive is not None:
+            # Record the answers in archive, or replay them without waiting,
+            # with a private session: a shared one is left as it is
+            self.session = archive_session(archive, replay, session)
+            if replay and rate_limiter is None:
+                rate_limiter = NoRateLimiter()
+        self.parser = get_parser(parser)
+        self.layout_cache = layout_cache if layout_cache is not None else _LAYOUT_CACHE
+        self.rate_limiter = rate_limiter if rate_limiter is not None else _RATE_LIMITER
+        self.cache = cache
+        self.metrics = metrics
+        self.streaming = streaming
+        self.checkpoint = checkpoint
+        self.writer = writer
+        self.dedup = dedup
+        self._first_page_url = None
+        self._skip_nb = 0  # Products of the next page already taken before resuming
         self.current_user_agent_index = 0
+        self._user_agent_lock = threading.Lock()
         self.headers = {
             'Host': 'www.amazon.com',
             'User-Agent': _USER_AGENT_LIST[0],
             'Accept': 'text/html,application/xhtml+xml, application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8'
         }
         self.product_dict_list = []
-        self.html_pages = []
+        self.html_pages = get_html_pages(keep_html_pages)
 
     def _change_user_agent(self):
-        """Switch User-Agent for the requests."""
-        self.current_user_agent_index = (self.current_user_agent_index + 1) % len(_USER_AGENT_LIST)
-        self.headers['User-Agent'] = _USER_AGENT_LIST[self.current_user_agent_index]
+        """Switch User-Agent for the requests. The headers are replaced by
+        a new dict, not updated: a request or a parsing running meanwhile
+        (with prefetch) keeps using the headers it read."""
+        with self._user_agent_lock:
+            self.current_user_agent_index = (self.current_user_agent_index + 1) % len(_USER_AGENT_LIST)
+            headers = dict(self.headers)
+            headers['User-Agent'] = _USER_AGENT_LIST[self.current_user_agent_index]
+            self.headers = headers
 
     def _get(self, url):
-        """Send a GET request with appropriate headers."""
-        response = self.session.get(url, headers=self.headers)
+        """Send a GET request with appropriate headers.
+        Valid pages are read from (and stored in) the cache if any. Requests
+        sent to Amazon go through the rate limiter, updated with the answer."""
+        headers = self.headers
+        if self.cache is not None:
+            text = self.cache.get(url, headers)
+            if text is not None:
+                return CachedResponse(url, text)
+        domain = headers['Host']
+        delay = self.rate_limiter.wait(domain)
+        start = time.perf_counter() if self.metrics is not None else None
+        try:
+            if self.streaming:
+                response = self.session.get(url, headers=headers, stream=True)
+                self._read_streamed(response)
+            else:
+                response = self.session.get(url, headers=headers)
+        except (requests.exceptions.RequestException, ConnectionError):
+            if start is not None:
+                self.metrics.observe('request_seconds', time.perf_counter() - start, answer='error')
+            raise
         if response.status_code != 200:
-            raise ConnectionError(f'Status code {response.status_code} for url {url}')
+            throttled = response.status_code in _THROTTLING_STATUS_CODES
+            if throttled:
+                self.rate_limiter.on_throttled(domain)
+            if start is not None:
+                self._observe_request(start, delay, 'throttled' if throttled else 'error', response.content)
+            raise StatusCodeError(response.status_code, url)
+        if self._check_page(response.text):
+            answer = 'page'
+            self.rate_limiter.on_success(domain)
+            if self.cache is not None:
+                self.cache.put(url, headers, response.text)
+        elif self._is_throttling_page(response.text):
+            answer = 'throttled'
+            self.rate_limiter.on_throttled(domain)
+        else:
+            answer = 'invalid'
+        if start is not None:
+            self._observe_request(start, delay, answer, response.content)
         return response
 
+    def _read_streamed(self, response):
+        """Read the body of a streamed response, and stop as soon as its
+        head shows an invalid page (Robot Check...)."""
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            body += chunk
+            if _is_invalid_page_head(body, len(chunk)):
+                break
+        # Closed before the end of the body, the connection is not reused
+        response.close()
+        response._content = bytes(body)
+        response._content_consumed = True
+
+    def _observe_request(self, start, rate_limit_delay, answer, content):
+        """Report the metrics of a request sent at start."""
+        self.metrics.observe('request_seconds', time.perf_counter() - start, answer=answer)
+        self.metrics.observe('response_bytes', len(content))
+        self.metrics.observe('rate_limit_wait_seconds', max(0.0, rate_limit_delay))
+
     def _update_headers(self, search_url):
         """Update the 'Host' field in the header based on the Amazon domain."""
-        domain = search_url.split("://")[1].split("/")[0]
-        self.base_url = f"https://{domain}/"
+        scheme, domain = search_url.split("://")[0], search_url.split("://")[1].split("/")[0]
+        self.base_url = f"{scheme}://{domain}/"
         self.headers['Host'] = domain
 
     def _get_search_url(self, keywords):
@@ -92,134 +262,263 @@ class AmazonClient:
 
     def _check_page(self, html_content):
         """Check if the page is valid for scraping."""
-        invalid_keywords = ["Sign in for the best experience", "The request could not be satisfied.", "Robot Check"]
-        return not any(keyword in html_content for keyword in invalid_keywords)
+        start = time.perf_counter() if self.metrics is not None else None
+        valid = not any(keyword in html_content for keyword in _INVALID_PAGE_KEYWORDS)
+        if start is not None:
+            self.metrics.observe('check_page_seconds', time.perf_counter() - start)
+        return valid
+
+    def _is_throttling_page(self, html_content):
+        """Check if the page shows that Amazon is throttling us."""
+        return any(keyword in html_content for keyword in _THROTTLING_KEYWORDS)
 
     def _get_page_html(self, search_url):
-        """Retrieve the HTML page and handle retries if necessary."""
+        """Retrieve the HTML page and handle retries if necessary.
+        The retries wait for an exponential backoff delay."""
+        start = time.perf_counter() if self.metrics is not None else None
         trials = 0
         while trials < _MAX_TRIAL_REQUESTS:
             trials += 1
             try:
                 res = self._get(search_url)
                 if self._check_page(res.text):
+                    if start is not None:
+                        self.metrics.observe('page_seconds', time.perf_counter() - start)
+                        self.metrics.observe('page_retries', trials - 1)
                     return res.text
             except (requests.exceptions.SSLError, ConnectionError):
                 pass
             self._change_user_agent()
-            time.sleep(_WAIT_TIME_BETWEEN_REQUESTS)
+            if trials == _MAX_TRIAL_REQUESTS:  # No retry to wait for
+                break
+            delay = self.rate_limiter.backoff_delay(trials)
+            if start is not None:
+                self.metrics.observe('backoff_seconds', delay)
+            time.sleep(delay)
         raise ValueError('No valid pages found!')
 
-    def _get_n_ratings(self, product):
-        """Extract the number of ratings from the product."""
-        n_ratings_selectors = [
-            "div.a-row.a-size-small span.a-size-base",
-            "div div.sg-row .a-spacing-top-mini span.a-size-small",
-            "div.a-column.a-span5.a-span-last > div.a-row.a-spacing-mini > a.a-size-small.a-link-normal.a-text-normal"
-        ]
-        for selector in n_ratings_selectors:
-            n_ratings = _css_select(product, selector)
-            try:
-                return int(n_ratings.replace(',', ''))
-            except ValueError:
-                continue
-        return float('nan')
-
-    def _get_title(self, product):
-        """Extract the product title."""
-        title_selectors = ['h5 span', "a.s-access-detail-page > h2", "div div.sg-row h5 > span"]
-        for selector in title_selectors:
-            title = _css_select(product, selector)
-            if title:
-                return title
-        return 'Title not found'
-
-    def _get_rating(self, product):
-        """Extract the product rating."""
-        rating = re.search(r'(\d.\d) out of 5', str(product))
-        return float(rating.group(1).replace(",", ".")) if rating else float('nan')
-
-    def _get_prices(self, product):
-        """Extract all prices of a product."""
-        raw_prices = product.find_all(text=re.compile('\$[\d,]+.\d\d'))
-        prices = {'prices_per_unit': set(), 'units': set(), 'prices_main': set()}
-        for raw_price in raw_prices:
-            price = float(re.search('\$([\d,]+.\d\d)', raw_price).group(1))
-            if raw_price.parent.parent.attrs.get('data-a-strike') == 'true' or raw_price == '$0.00':
-                continue
-            elif raw_price.startswith('(') and '/' in raw_price:
-                price_per_unit = re.findall(r'/(.*)\)', raw_price)[0]
-                prices['prices_per_unit'].add(price)
-                prices['units'].add(price_per_unit)
-            else:
-                prices['prices_main'].add(price)
-        return {key: (value.pop() if len(value) == 1 else ', '.join(map(str, value))) if value else float('nan')
-                for key, value in prices.items()}
+    def _extract_page(self, page, max_product_nb, page_url=None):
+        """Extract products from the page at page_url, append them to
+        product_dict_list, and return the next page URL."""
+        # One more product than needed, to know if the page is cut
+        product_dict_list, next_page_url = self._parse_products(
+            page, self._page_product_nb(max_product_nb))
+        return self._add_page(product_dict_list, next_page_url, max_product_nb, page_url)
+
+    def _page_product_nb(self, max_product_nb):
+        """Return the number of products to extract from the next page."""
+        if self.dedup is not None:
+            return sys.maxsize
+        return self._skip_nb + max_product_nb - len(self.product_dict_list) + 1
+
+    def _add_page(self, product_dict_list, next_page_url, max_product_nb, page_url):
+        """Append the products of a parsed page to product_dict_list (at
+        most max_product_nb in all), write and checkpoint them, and return
+        the next page URL."""
+        skip_nb, self._skip_nb = self._skip_nb, 0
+        product_dict_list = product_dict_list[skip_nb:]
+        kept_product_dict_list, taken_nb = self._drop_duplicates(
+            product_dict_list, max_product_nb - len(self.product_dict_list))
+        self.product_dict_list.extend(kept_product_dict_list)
+        self._write_page(kept_product_dict_list)
+        if page_url is not None and taken_nb < len(product_dict_list):
+            # The page is cut at max_product_nb: a resumed crawl takes its next products
+            self._save_checkpoint(page_url, kept_product_dict_list, skip_nb + taken_nb)
+        else:
+            self._save_checkpoint(next_page_url, kept_product_dict_list)
+        return next_page_url
+
+    def _resume_checkpoint(self, search_url):
+        """Restore the products saved in the checkpoint (if any) for the crawl
+        starting at search_url, and return the URL of the page to get next."""
+        self._first_page_url = search_url
+        state = self.checkpoint.load(search_url) if self.checkpoint is not None else None
+        if state is None:
+            return search_url
+        next_page_url, product_dict_list, self._skip_nb = state
+        self.product_dict_list.extend(product_dict_list)
+        if self.dedup is not None:
+            self.dedup.add(product_dict_list)
+        self._write_page(product_dict_list)  # The output starts again from the first product
+        return next_page_url
+
+    def _save_checkpoint(self, next_page_url, product_dict_list, skip_nb=0):
+        """Save the products of a page and the next page URL in the checkpoint
+        (with the number of its products to skip if it is the same page)."""
+        if self.checkpoint is not None:
+            self.checkpoint.save_page(self._first_page_url, next_page_url, product_dict_list, skip_nb)
+
+    def _drop_duplicates(self, product_dict_list, max_product_nb):
+        """Return the products of a page (at most max_product_nb) without
+        the ones already seen by the ASIN index, and the number of products
+        of the page taken (kept or dropped) to get them."""
+        max_product_nb = max(0, max_product_nb)
+        if self.dedup is None:
+            kept_product_dict_list = product_dict_list[:max_product_nb]
+            return kept_product_dict_list, len(kept_product_dict_list)
+        kept_product_dict_list = self.dedup.filter(product_dict_list, max_product_nb)
+        if len(kept_product_dict_list) < max_product_nb:
+            return kept_product_dict_list, len(product_dict_list)
+        if not kept_product_dict_list:
+            return kept_product_dict_list, 0
+        last_product_dict = kept_product_dict_list[-1]
+        return kept_product_dict_list, next(index + 1 for index, product_dict in enumerate(product_dict_list)
+                                            if product_dict is last_product_dict)
+
+    def _write_page(self, product_dict_list):
+        """Write the products of a page with the writer."""
+        if self.writer is not None:
+            self.writer.write_page(product_dict_list)
 
-    def _extract_page(self, page, max_product_nb):
-        """Extract products from a page."""
-        soup = BeautifulSoup(page, _DEFAULT_BEAUTIFULSOUP_PARSER)
+    def _parse_products(self, page, max_product_nb):
+        """Return the products of a page (at most max_product_nb) and the next page URL."""
+        start = time.perf_counter() if self.metrics is not None else None
+        soup = self.parser.parse(page)
+        headers = self.headers
+        layout_key = (headers['Host'], headers['User-Agent'])
         products = []
-        for selector in CSS_SELECTORS.values():
-            products = soup.select(selector.get('product', ''))
+        for layout in self.layout_cache.layout_order(layout_key):
+            products = self.parser.select(soup, CSS_SELECTORS[layout].get('product', ''))
+            self.layout_cache.record(layout_key, layout, bool(products))
             if products:
                 break
-        for product in products:
-            if len(self.product_dict_list) >= max_product_nb:
-                break
-            product_dict = {
-                'title': self._get_title(product),
-                'rating': self._get_rating(product),
-                'review_nb': self._get_n_ratings(product),
-                'img': self._get_img(product),
-                'url': self._get_url(product),
-                'asin': self._get_asin(product),
-            }
-            product_dict.update(self._get_prices(product))
-            self.product_dict_list.append(product_dict)
-
-        return self._get_next_page_url(soup)
+        products = products[:max(0, max_product_nb)]
+        product_dict_list = [self._extract_product(product, first_matches)
+                             for product, first_matches in zip(products, self._match_field_selectors(products))]
+        next_page_url = self._get_next_page_url(soup)
+        if start is not None:
+            self.metrics.observe('extract_page_seconds', time.perf_counter() - start)
+            self.metrics.observe('products_per_page', len(product_dict_list))
+        return product_dict_list, next_page_url
 
-    def _get_next_page_url(self, soup):
-        """Extract the next page URL."""
-        next_page_url = soup.select(CSS_SELECTORS['mobile']['next_page_url'])
-        return urljoin(self.base_url, next_page_url[0].get('href')) if next_page_url else None
+    def _match_field_selectors(self, products):
+        """Find, for each product, the first node matching each selector of the
+        field extractors. Each product subtree is walked once, and each selector
+        runs once on the product list, instead of once per product."""
+        if not products:
+            return []
+        product_list = self._common_ancestor(products[0], products[-1])
+        product_index = {}
+        for index, product in enumerate(products):
+            for node in self.parser.elements(product):
+                product_index[self.parser.node_id(node)] = index
+        first_matches = [{} for _ in products]
+        for selector in field_selectors():
+            for node in self.parser.select(product_list, selector):
+                index = product_index.get(self.parser.node_id(node))
+                if index is not None:
+                    first_matches[index].setdefault(selector, node)
+        return first_matches
 
-    def _get_img(self, product):
-        """Extract the image URL."""
-        img_url = _css_select(product, 'img[src]')
-        return _get_high_res_img_url(img_url) if img_url else ''
+    def _common_ancestor(self, first_node, last_node):
+        """Return the deepest node containing both nodes."""
+        ancestor_ids = set()
+        node = self.parser.parent(first_node)
+        while node is not None:
+            ancestor_ids.add(self.parser.node_id(node))
+            node = self.parser.parent(node)
+        node = self.parser.parent(last_node)
+        while self.parser.node_id(node) not in ancestor_ids:
+            node = self.parser.parent(node)
+        return node
 
-    def _get_url(self, product):
-        """Extract the product URL."""
-        url = _css_select(product, 'a[href]')
-        return urljoin(self.base_url, url) if url else ''
+    def _extract_product(self, product, first_matches):
+        """Fill the product dict with the registered field extractors."""
+        product_dict = {}
+        if self.metrics is None:
+            for extractor in FIELD_EXTRACTORS.values():
+                nodes = [first_matches.get(selector) for selector in extractor.selectors]
+                product_dict.update(extractor.extract(self, product, nodes))
+            return product_dict
+        for name, extractor in FIELD_EXTRACTORS.items():
+            start = time.perf_counter()
+            nodes = [first_matches.get(selector) for selector in extractor.selectors]
+            product_dict.update(extractor.extract(self, product, nodes))
+            self.metrics.observe('field_seconds', time.perf_counter() - start, field=name)
+        return product_dict
 
-    def _get_asin(self, product):
-        """Extract the ASIN from the product URL."""
-        return self._get_url(product).split('/')[-1]
+    def _get_next_page_url(self, soup):
+        """Extract the next page URL."""
+        next_page_url = self.parser.select(soup, CSS_SELECTORS['mobile']['next_page_url'])
+        return urljoin(self.base_url, self.parser.attr(next_page_url[0], 'href')) if next_page_url else None
 
-    def _get_products(self, keywords="", search_url="", max_product_nb=100):
-        """Get products from Amazon based on search keywords."""
+    def _get_products(self, keywords="", search_url="", max_product_nb=100, prefetch=False):
+        """Get products from Amazon based on search keywords.
+        With `prefetch`, the next page is downloaded while the current one is parsed.
+        With a checkpoint, the crawl resumes from the last page saved."""
         if not search_url:
             search_url = self._get_search_url(keywords)
         self._update_headers(search_url)
-        while len(self.product_dict_list) < max_product_nb:
+        search_url = self._resume_checkpoint(search_url)
+        if not search_url or len(self.product_dict_list) >= max_product_nb:
+            return self.product_dict_list
+        if prefetch:
+            return self._get_products_prefetching(search_url, max_product_nb)
+        while search_url and len(self.product_dict_list) < max_product_nb:
             page = self._get_page_html(search_url)
             self.html_pages.append(page)
-            search_url = self._extract_page(page, max_product_nb)
+            search_url = self._extract_page(page, max_product_nb, search_url)
         return self.product_dict_list
 
+    def _iter_products(self, keywords="", search_url="", max_product_nb=100):
+        """Yield the products from Amazon as soon as their page is parsed.
+        Unlike _get_products, nothing is kept in product_dict_list or html_pages."""
+        if not search_url:
+            search_url = self._get_search_url(keywords)
+        self._update_headers(search_url)
+        product_nb = 0
+        while search_url and product_nb < max_product_nb:
+            page = self._get_page_html(search_url)
+            product_dict_list, search_url = self._parse_products(
+                page, max_product_nb - product_nb if self.dedup is None else sys.maxsize)
+            product_dict_list, _ = self._drop_duplicates(product_dict_list, max_product_nb - product_nb)
+            del page  # Not kept alive while the products are consumed
+            product_nb += len(product_dict_list)
+            self._write_page(product_dict_list)
+            yield from product_dict_list
 
-def _css_select(soup, selector):
-    """Select content by CSS selector."""
-    selection = soup.select(selector)
-    return selection[0].text.strip() if selection else None
+    def _get_products_prefetching(self, search_url, max_product_nb):
+        """Pipelined version of the _get_products loop.
+        The next page URL is guessed from the raw HTML, and downloaded in a
+        background thread while the current page is parsed. The prefetched
+        page is only used if the guess matches the URL found by the parser.
+        No page is prefetched when the current one seems to hold enough
+        products, and the prefetch in progress is awaited before returning."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        prefetched_page = None
+        try:
+            page_url = search_url
+            page = self._get_page_html(page_url)
+            while True:
+                self.html_pages.append(page)
+                guessed_url = self._guess_next_page_url(page)
+                prefetched_page = None
+                if guessed_url and len(self.product_dict_list) + self._guess_product_nb(page) < max_product_nb:
+                    prefetched_page = executor.submit(self._get_page_html, guessed_url)
+                search_url = self._extract_page(page, max_product_nb, page_url)
+                if not search_url or len(self.product_dict_list) >= max_product_nb:
+                    break
+                page_url = search_url
+                if prefetched_page is not None and guessed_url == search_url:
+                    page = prefetched_page.result()
+                else:
+                    page = self._get_page_html(search_url)
+        finally:
+            # The prefetching thread uses the session and the rate limiter
+            if prefetched_page is not None:
+                prefetched_page.cancel()
+            executor.shutdown(wait=True)
+        return self.product_dict_list
 
+    def _guess_product_nb(self, html_content):
+        """Guess the number of products of a page from its raw HTML, without
+        parsing it (the distinct ASINs of its product links)."""
+        return len(set(_PRODUCT_ASIN_REGEX.findall(html_content)))
 
-def _get_high_res_img_url(url):
-    """Get high-resolution image URL."""
-    return re.sub(r'\._AC_.*?\.jpg', r'.jpg', url)
+    def _guess_next_page_url(self, html_content):
+        """Find the next page URL in the raw HTML, without parsing it."""
+        match = _NEXT_PAGE_URL_REGEX.search(html_content)
+        return urljoin(self.base_url, unescape(match.group(1))) if match else None
 
 
 # Sample usage
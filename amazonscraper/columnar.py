@@ -0,0 +1,210 @@
+""" Columnar storage of the products, backed by NumPy arrays.
+
+A ProductTable keeps each field of the products in a column: the numbers
+(rating, review_nb and the prices) in float arrays, NaN when missing, and
+the strings in a single UTF-8 buffer per column. Filtering, sorting and
+aggregating millions of products are then vector operations:
+
+    table = ProductTable.from_products(amazonscraper.search("Python", max_product_nb=1000))
+    best = table.filter((table['rating'] >= 4.5) & (table['review_nb'] >= 100))
+    print(best.sort('review_nb', descending=True)['title'][:10])
+"""
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+NUMERIC_FIELDS = ('rating', 'review_nb', 'prices_per_unit', 'prices_main')
+# Numeric fields extracted as integers (stored as floats for the NaN)
+_INTEGER_FIELDS = frozenset(['review_nb'])
+STRING_FIELDS = ('title', 'img', 'url', 'asin', 'units')
+_AGGREGATES = {
+    'count': lambda values: int(np.count_nonzero(~np.isnan(values))),
+    'sum': lambda values: np.nansum(values),
+    'mean': lambda values: np.nanmean(values),
+    'median': lambda values: np.nanmedian(values),
+    'min': lambda values: np.nanmin(values),
+    'max': lambda values: np.nanmax(values),
+}
+
+
+def _to_float(value):
+    """Return a numeric field as a float: NaN if missing, and the lowest
+    price if the field joins several prices
+    >>> _to_float(4.5), _to_float('1,102'), _to_float('12.99, 9.99'), _to_float('')
+    (4.5, 1102.0, 9.99, nan)
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return min(float(price.replace(',', '')) for price in value.split(', '))
+    except (AttributeError, ValueError):
+        return float('nan')
+
+
+def _to_python(field, value):
+    """Return a value of a column as the type extracted for its field
+    >>> _to_python('review_nb', np.float64(37.0)), _to_python('rating', np.float64(4.5))
+    (37, 4.5)
+    """
+    if field not in NUMERIC_FIELDS:
+        return value
+    value = value.item()
+    return int(value) if field in _INTEGER_FIELDS and value == value else value
+
+
+class StringColumn(object):
+    """Strings stored end to end in a UTF-8 buffer, with their offsets
+    >>> column = StringColumn.from_strings(['Python', '', 'Café'])
+    >>> len(column), column[2], list(column.take([2, 0]))
+    (3, 'Café', ['Café', 'Python'])
+    """
+    def __init__(self, data, offsets):
+        self.data = data  # uint8 array
+        self.offsets = offsets  # int64 array, one more than the strings
+
+    @classmethod
+    def from_strings(cls, strings):
+        """Build a column from an iterable of strings (None or NaN are "")."""
+        encoded = [string.encode('utf-8') if isinstance(string, str) else b'' for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        buffer = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield buffer[start:end].decode('utf-8')
+
+    def __repr__(self):
+        return f'StringColumn({list(self)!r})'
+
+    def take(self, indices):
+        """Return a column of the strings at the given indices."""
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.offsets[indices]
+        lengths = self.offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Position in self.data of each byte of the new buffer
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return StringColumn(self.data[positions], offsets)
+
+    def to_array(self):
+        """Return the strings as a NumPy array of Python strings."""
+        array = np.empty(len(self), dtype=object)
+        array[:] = list(self)
+        return array
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+
+class ProductTable(object):
+    """Products stored by column. table['rating'] returns a column (a float
+    array or a StringColumn), table[i] a Product, and table[mask] or
+    table[indices] a new table. The fields of registered extractors are
+    not kept."""
+    def __init__(self, columns):
+        if np is None:
+            raise ImportError('ProductTable requires numpy (pip install numpy)')
+        self.columns = columns
+
+    @classmethod
+    def from_products(cls, products):
+        """Build a table from Products, or a list of Product objects or
+        product dicts."""
+        if np is None:
+            raise ImportError('ProductTable requires numpy (pip install numpy)')
+        product_dicts = [getattr(product, 'product', product) for product in products]
+        columns = {}
+        for field in NUMERIC_FIELDS:
+            columns[field] = np.fromiter((_to_float(product_dict.get(field, '')) for product_dict in product_dicts),
+                                         dtype=np.float64, count=len(product_dicts))
+        for field in STRING_FIELDS:
+            columns[field] = StringColumn.from_strings(product_dict.get(field) for product_dict in product_dicts)
+        return cls(columns)
+
+    def __len__(self):
+        return len(self.columns['rating'])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        if isinstance(key, (int, np.integer)):
+            from amazonscraper import Product
+            return Product({field: _to_python(field, self.columns[field][key]) for field in self.columns})
+        return self.take(np.arange(len(self))[key])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def take(self, indices):
+        """Return a table of the products at the given indices."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return ProductTable({field: column.take(indices) for field, column in self.columns.items()})
+
+    def filter(self, mask):
+        """Return a table of the products where the boolean array mask is
+        true (comparisons with NaN are false, so products missing a field
+        are dropped by a condition on it)."""
+        return self.take(np.flatnonzero(mask))
+
+    def sort(self, field, descending=False):
+        """Return a table of the products sorted by a field (the missing
+        numbers last). The sort is stable."""
+        column = self.columns[field]
+        if field in NUMERIC_FIELDS:
+            # NaN are sorted last, whatever the sign
+            keys = -column if descending else column
+        else:
+            # Rank of each string in the sorted distinct strings
+            _, keys = np.unique(column.to_array(), return_inverse=True)
+            keys = -keys if descending else keys
+        indices = np.argsort(keys, kind='stable')
+        return self.take(indices)
+
+    def aggregate(self, field, function='mean'):
+        """Return an aggregate of a numeric field, ignoring the missing
+        values: 'count', 'sum', 'mean', 'median', 'min' or 'max' (NaN if
+        no value)."""
+        if field not in NUMERIC_FIELDS:
+            raise ValueError(f'{field} is not a numeric field ({", ".join(NUMERIC_FIELDS)})')
+        try:
+            aggregate = _AGGREGATES[function]
+        except KeyError:
+            raise ValueError(f'Unknown aggregate {function} ({", ".join(_AGGREGATES)})')
+        values = self.columns[field]
+        if function != 'count' and np.isnan(values).all():
+            return float('nan')
+        return float(aggregate(values))
+
+    def describe(self):
+        """Return every aggregate of every numeric field, as a dict of dicts."""
+        return {field: {function: self.aggregate(field, function) for function in _AGGREGATES}
+                for field in NUMERIC_FIELDS}
+
+    def to_products(self):
+        """Return the products as a Products object."""
+        from amazonscraper import Products
+        products = Products()
+        products.products = list(self)
+        return products
+
+    @property
+    def nbytes(self):
+        """Memory used by the columns, in bytes."""
+        return sum(column.nbytes for column in self.columns.values())
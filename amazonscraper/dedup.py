@@ -0,0 +1,106 @@
+""" Deduplication of the products by ASIN, across pages and searches.
+
+Amazon repeats the sponsored products on many result pages. With an
+AsinIndex, a search drops the products whose ASIN was already seen, so
+that they do not count toward max_product_nb. Share the index between the
+searches of a batch to keep each product once in all their results:
+
+    index = AsinIndex()
+    for result in amazonscraper.search_many(queries, dedup=index):
+        ...
+    print(index.stats())
+"""
+import threading
+
+
+def _is_missing(value):
+    """Return True for the values of the fields not found ("" or NaN)."""
+    return value is None or value == "" or value != value
+
+
+class AsinIndex(object):
+    """Set of the ASINs of the products kept. With `merge`, the fields
+    missing from a kept product dict are filled from its duplicates (which
+    are still dropped), and get(asin) returns it. The dict is updated in
+    place, so the filled fields only reach the products of a search()
+    still running (its Products are built at the end): not the products
+    already yielded by iter_search(), written by a writer, or returned by
+    an earlier search. The products without an ASIN are always kept. The
+    index can be shared by searches running in several threads
+    >>> index = AsinIndex()
+    >>> [product['title'] for product in index.filter([{'asin': 'A1', 'title': 'Book'},
+    ...                                                {'asin': 'A1', 'title': 'Sponsored book'},
+    ...                                                {'asin': 'A2', 'title': 'Book 2'}])]
+    ['Book', 'Book 2']
+    >>> index.stats()
+    {'products': 3, 'duplicates': 1, 'dedup_rate': 0.3333333333333333}
+    """
+    def __init__(self, merge=False):
+        self.merge = merge
+        self.product_nb = 0  # Products seen, duplicates included
+        self.duplicate_nb = 0
+        self._products = {}  # Kept product dict (or None without merge), by ASIN
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._products)
+
+    def __contains__(self, asin):
+        return asin in self._products
+
+    def filter(self, product_dict_list, max_product_nb=None):
+        """Return the products of a page whose ASIN was not seen before, at
+        most max_product_nb, and add their ASINs to the index. The products
+        after the max_product_nb kept ones are not looked at."""
+        kept = []
+        with self._lock:
+            for product_dict in product_dict_list:
+                if max_product_nb is not None and len(kept) >= max_product_nb:
+                    break
+                self.product_nb += 1
+                asin = product_dict.get('asin')
+                if not asin:
+                    kept.append(product_dict)
+                elif asin not in self._products:
+                    self._products[asin] = product_dict if self.merge else None
+                    kept.append(product_dict)
+                else:
+                    self.duplicate_nb += 1
+                    if self.merge:
+                        self._merge(self._products[asin], product_dict)
+        return kept
+
+    def get(self, asin):
+        """Return the kept product dict of an ASIN, with the fields merged
+        from its duplicates (requires `merge`), or None if not seen."""
+        if not self.merge:
+            raise ValueError('AsinIndex keeps the product dicts only with merge=True')
+        with self._lock:
+            return self._products.get(asin)
+
+    def add(self, product_dict_list):
+        """Add the ASINs of products already kept (restored from a
+        checkpoint), without counting them."""
+        with self._lock:
+            for product_dict in product_dict_list:
+                asin = product_dict.get('asin')
+                if asin:
+                    self._products.setdefault(asin, product_dict if self.merge else None)
+
+    @staticmethod
+    def _merge(product_dict, duplicate_dict):
+        """Fill the missing fields of product_dict from its duplicate."""
+        for field, value in duplicate_dict.items():
+            if _is_missing(product_dict.get(field)) and not _is_missing(value):
+                product_dict[field] = value
+
+    @property
+    def dedup_rate(self):
+        """Share of the products seen which were duplicates (0 if none seen)."""
+        return self.duplicate_nb / self.product_nb if self.product_nb else 0.0
+
+    def stats(self):
+        """Return the number of products seen, of duplicates, and their share."""
+        with self._lock:
+            return {'products': self.product_nb, 'duplicates': self.duplicate_nb,
+                    'dedup_rate': self.dedup_rate}
@@ -0,0 +1,123 @@
+""" Registry of the extractors filling the fields of a product dict.
+
+Each extractor declares the CSS selectors it needs. For each product,
+AmazonClient walks the product subtree once, keeps the first node matching
+each selector of the registry, and gives these nodes to the extractors.
+"""
+import re
+from collections import OrderedDict, namedtuple
+from urllib.parse import urljoin
+
+_RATING_REGEX = re.compile(r'(\d.\d) out of 5')
+_PRICE_REGEX = re.compile(r'\$([\d,]+.\d\d)')
+_UNIT_REGEX = re.compile(r'/(.*)\)')
+_IMG_SIZE_REGEX = re.compile(r'\._AC_.*?\.jpg')
+
+FieldExtractor = namedtuple('FieldExtractor', ['selectors', 'extract'])
+
+# Extractors by name, in the order of the product dict keys
+FIELD_EXTRACTORS = OrderedDict()
+
+
+def register_field(name, selectors=()):
+    """Decorator registering a field extractor.
+    The function is called as extract(client, product, nodes), where nodes
+    holds the first node matching each of the selectors (None if no match),
+    and returns a dict of product fields. Registering an existing name
+    replaces its extractor.
+    >>> @register_field('badge', selectors=['span.a-badge-text'])
+    ... def _extract_badge(client, product, nodes):
+    ...     return {'badge': client.parser.text(nodes[0]) if nodes[0] is not None else ''}
+    >>> list(FIELD_EXTRACTORS)[-1]
+    'badge'
+    >>> del FIELD_EXTRACTORS['badge']
+    """
+    def decorator(extract):
+        FIELD_EXTRACTORS[name] = FieldExtractor(tuple(selectors), extract)
+        return extract
+    return decorator
+
+
+def field_selectors():
+    """Return the selectors of all the registered extractors, without duplicates."""
+    return list(OrderedDict.fromkeys(
+        selector for extractor in FIELD_EXTRACTORS.values() for selector in extractor.selectors))
+
+
+@register_field('title', selectors=['h5 span', "a.s-access-detail-page > h2", "div div.sg-row h5 > span"])
+def _extract_title(client, product, nodes):
+    """Extract the product title."""
+    for node in nodes:
+        title = client.parser.text(node).strip() if node is not None else None
+        if title:
+            return {'title': title}
+    return {'title': 'Title not found'}
+
+
+@register_field('rating')
+def _extract_rating(client, product, nodes):
+    """Extract the product rating from the first text like '4.5 out of 5 stars'."""
+    for string, _ in client.parser.strings(product):
+        rating = _RATING_REGEX.search(string)
+        if rating:
+            return {'rating': float(rating.group(1).replace(",", "."))}
+    return {'rating': float('nan')}
+
+
+@register_field('review_nb', selectors=[
+    "div.a-row.a-size-small span.a-size-base",
+    "div div.sg-row .a-spacing-top-mini span.a-size-small",
+    "div.a-column.a-span5.a-span-last > div.a-row.a-spacing-mini > a.a-size-small.a-link-normal.a-text-normal"
+])
+def _extract_n_ratings(client, product, nodes):
+    """Extract the number of ratings from the product."""
+    for node in nodes:
+        if node is None:
+            continue
+        try:
+            return {'review_nb': int(client.parser.text(node).strip().replace(',', ''))}
+        except ValueError:
+            continue
+    return {'review_nb': float('nan')}
+
+
+@register_field('img', selectors=['img[src]'])
+def _extract_img(client, product, nodes):
+    """Extract the image URL."""
+    img = nodes[0]
+    return {'img': _get_high_res_img_url(client.parser.attr(img, 'src')) if img is not None else ''}
+
+
+@register_field('url', selectors=['a[href]'])
+def _extract_url_and_asin(client, product, nodes):
+    """Extract the product URL, and the ASIN at its end."""
+    link = nodes[0]
+    url = urljoin(client.base_url, client.parser.attr(link, 'href')) if link is not None else ''
+    return {'url': url, 'asin': url.split('/')[-1]}
+
+
+@register_field('prices')
+def _extract_prices(client, product, nodes):
+    """Extract all prices of a product."""
+    parser = client.parser
+    prices = {'prices_per_unit': set(), 'units': set(), 'prices_main': set()}
+    for raw_price, parent in parser.strings(product):
+        match = _PRICE_REGEX.search(raw_price)
+        if not match or raw_price == '$0.00':
+            continue
+        if parser.attr(parser.parent(parent), 'data-a-strike') == 'true':
+            continue
+        price = float(match.group(1).replace(',', ''))
+        if raw_price.startswith('(') and '/' in raw_price:
+            price_per_unit = _UNIT_REGEX.findall(raw_price)[0]
+            prices['prices_per_unit'].add(price)
+            prices['units'].add(price_per_unit)
+        else:
+            prices['prices_main'].add(price)
+    return {key: (value.pop() if len(value) == 1 else ', '.join(map(str, value))) if value else float('nan')
+            for key, value in prices.items()}
+
+
+def _get_high_res_img_url(url):
+    """Get high-resolution image URL."""
+    return _IMG_SIZE_REGEX.sub('.jpg', url)
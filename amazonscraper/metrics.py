@@ -0,0 +1,158 @@
+""" Timing and size metrics of the searches, reported to a pluggable sink.
+
+When a client has a `metrics` sink, it reports every observation of its hot
+path as sink.observe(name, value, **labels):
+
+    request_seconds{answer}    time of each request sent to Amazon, by answer
+                               ('page', 'throttled', 'invalid' or 'error')
+    response_bytes             size of each page received
+    rate_limit_wait_seconds    time waited for the rate limiter before a request
+    backoff_seconds            time waited before a retry
+    page_seconds               time to get a valid page, retries included
+    page_retries               number of retries to get a valid page
+    check_page_seconds         time to check whether a page is valid
+    extract_page_seconds       time to parse a page and extract its products
+    products_per_page          number of products extracted from a page
+    field_seconds{field}       time of each field extractor, for each product
+
+Without a sink (the default), the hooks cost a test on None.
+"""
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+
+# Upper bounds of the histogram buckets, by unit (name suffix)
+_SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+_PROMETHEUS_PREFIX = 'amazonscraper_'
+
+
+def _buckets(name):
+    """Return the histogram buckets of a metric, from its unit."""
+    if name.endswith('_seconds'):
+        return _SECONDS_BUCKETS
+    if name.endswith('_bytes'):
+        return _BYTES_BUCKETS
+    return _COUNT_BUCKETS
+
+
+class Histogram(object):
+    """Count of the observations in each bucket, and their sum
+    >>> histogram = Histogram((1, 10))
+    >>> for value in (0.5, 2, 3, 50):
+    ...     histogram.observe(value)
+    >>> histogram.bucket_counts, histogram.count, histogram.sum
+    ([1, 2, 1], 4, 55.5)
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Add an observation."""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self):
+        """Mean of the observations (0 if none)."""
+        return self.sum / self.count if self.count else 0.0
+
+
+class MetricsSink(object):
+    """Base class of the sinks receiving the observations of the clients"""
+    def observe(self, name, value, **labels):
+        raise NotImplementedError
+
+
+class InMemorySink(MetricsSink):
+    """Keep a histogram of each metric and set of labels in memory"""
+    def __init__(self):
+        self.histograms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(_buckets(name))
+            histogram.observe(value)
+
+    def histogram(self, name, **labels):
+        """Return the histogram of a metric and labels (None if not observed)."""
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    def summary(self):
+        """Return the count, sum and mean of each metric, summed over the labels."""
+        summary = OrderedDict()
+        with self._lock:
+            for (name, _), histogram in self.histograms.items():
+                count, total = summary.get(name, (0, 0.0))
+                summary[name] = (count + histogram.count, total + histogram.sum)
+        return OrderedDict((name, {'count': count, 'sum': total, 'mean': total / count if count else 0.0})
+                           for name, (count, total) in summary.items())
+
+
+class LoggingSink(MetricsSink):
+    """Log each observation (at DEBUG level by default)"""
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.level = level
+
+    def observe(self, name, value, **labels):
+        if self.logger.isEnabledFor(self.level):
+            label_text = ''.join(f' {key}={label}' for key, label in sorted(labels.items()))
+            self.logger.log(self.level, '%s %g%s', name, value, label_text)
+
+
+class PrometheusSink(InMemorySink):
+    """In-memory histograms, exposed in the Prometheus text format"""
+    def exposition(self):
+        """Return the histograms in the Prometheus text exposition format
+        >>> sink = PrometheusSink()
+        >>> sink.observe('page_retries', 2)
+        >>> print(sink.exposition())  # doctest: +ELLIPSIS
+        # TYPE amazonscraper_page_retries histogram
+        amazonscraper_page_retries_bucket{le="0"} 0
+        amazonscraper_page_retries_bucket{le="1"} 0
+        amazonscraper_page_retries_bucket{le="2"} 1
+        ...
+        amazonscraper_page_retries_bucket{le="+Inf"} 1
+        amazonscraper_page_retries_sum 2
+        amazonscraper_page_retries_count 1
+        <BLANKLINE>
+        """
+        lines = []
+        typed_names = set()
+        with self._lock:
+            # The series of a metric must be contiguous
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0][0]):
+                metric = _PROMETHEUS_PREFIX + name
+                if metric not in typed_names:
+                    typed_names.add(metric)
+                    lines.append(f'# TYPE {metric} histogram')
+                label_text = ''.join(f'{key}="{_escape(value)}",' for key, value in labels)
+                cumulative_count = 0
+                for bound, bucket_count in zip(_bucket_labels(histogram), histogram.bucket_counts):
+                    cumulative_count += bucket_count
+                    lines.append(f'{metric}_bucket{{{label_text}le="{bound}"}} {cumulative_count}')
+                label_text = '{' + label_text.rstrip(',') + '}' if labels else ''
+                lines.append(f'{metric}_sum{label_text} {histogram.sum:g}')
+                lines.append(f'{metric}_count{label_text} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _bucket_labels(histogram):
+    """Return the 'le' label of each bucket of a histogram."""
+    return [f'{bound:g}' for bound in histogram.buckets] + ['+Inf']
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,339 @@
+""" Local stand-in for the Amazon search, to test the whole fetch, check,
+parse and paginate loop without the network.
+
+MockAmazonServer serves generated result pages in any of the CSS_SELECTORS
+layouts, with the pagination links followed by AmazonClient, and answers a
+configurable share of the requests with a 503, a "Robot Check" page or a
+"Sign in for the best experience" page, after a configurable latency:
+
+    with MockAmazonServer(layout='desktop_2', error_rate=0.1, latency=0.05) as server:
+        products = amazonscraper.search(search_url=server.search_url("python"))
+
+Run `python -m amazonscraper.mockserver --help` to serve it, or to measure
+the end-to-end throughput of the client against it.
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, urlsplit
+
+import click
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.throttle import NoRateLimiter, RateLimiter
+
+_DEFAULT_PAGE_NB = 20
+_DEFAULT_PRODUCTS_PER_PAGE = 16
+_POLL_INTERVAL = 0.05  # seconds, delay of stop()
+
+_PAGE_TEMPLATE = """<!doctype html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>Amazon.com : {keywords}</title>
+</head>
+<body>
+{products}
+  <ul class="a-pagination">
+    <li class="a-selected"><a href="/s?k={keywords_url}&amp;page={page}">{page}</a></li>
+    {next_page}
+  </ul>
+</body>
+</html>
+"""
+_NEXT_PAGE_TEMPLATE = '<li class="a-last"><a href="/s?k={keywords_url}&amp;page={page}">Next</a></li>'
+_LAST_PAGE = '<li class="a-disabled">Next</li>'
+
+# (product list, product) templates of each layout
+_LAYOUT_TEMPLATES = {
+    'mobile': ('<ul id="resultItems">\n{}\n</ul>', """    <li>
+      <a href="/{slug}/dp/{asin}">
+        <div>
+          <div class="sx-table-detail">
+            <h5><span>{title}</span></h5>
+            <div class="a-icon-row a-size-small">
+              <i class="a-icon a-icon-star"><span>{rating} out of 5 stars</span></i>
+            </div>
+            <div class="a-row a-size-small"><span class="a-size-base">{review_nb}</span></div>
+            <div class="a-row"><span class="a-price"><span class="a-offscreen">${price}</span></span></div>
+          </div>
+        </div>
+        <img src="https://images-na.ssl-images-amazon.com/images/I/{asin}._AC_US218_.jpg">
+      </a>
+    </li>"""),
+    'mobile_grid': ('<ul id="grid-atf-content">\n{}\n</ul>', """    <li>
+      <div class="s-item-container">
+        <a href="/{slug}/dp/{asin}">
+          <img src="https://images-na.ssl-images-amazon.com/images/I/{asin}._AC_SR160,160_.jpg">
+          <div>
+            <h5 class="sx-title"><span>{title}</span></h5>
+            <div class="a-icon-row a-size-mini">
+              <i class="a-icon a-icon-star"><span>{rating} out of 5 stars</span></i>
+            </div>
+            <div class="a-row a-size-small"><span class="a-size-base">{review_nb}</span></div>
+            <div class="a-row"><span class="a-price"><span class="a-offscreen">${price}</span></span></div>
+          </div>
+        </a>
+      </div>
+    </li>"""),
+    'desktop': ('<ul id="s-results-list-atf">\n{}\n</ul>', """    <li class="s-result-item" data-asin="{asin}">
+      <div class="s-item-container">
+        <div class="a-row">
+          <div class="a-column a-span12 a-text-center">
+            <a class="a-link-normal a-text-normal" href="/{slug}/dp/{asin}"><img src="https://images-na.ssl-images-amazon.com/images/I/{asin}._AC_US218_.jpg"></a>
+          </div>
+        </div>
+        <div class="a-row a-spacing-small">
+          <div class="a-row a-spacing-none">
+            <a class="a-link-normal s-access-detail-page a-text-normal" href="/{slug}/dp/{asin}"><h2>{title}</h2></a>
+          </div>
+        </div>
+        <div class="a-row">
+          <div class="a-column a-span7"><span class="a-color-price">${price}</span></div>
+          <div class="a-column a-span5 a-span-last">
+            <div class="a-row a-spacing-mini">
+              <i class="a-icon a-icon-star"><span class="a-icon-alt">{rating} out of 5 stars</span></i>
+              <a class="a-size-small a-link-normal a-text-normal" href="/product-reviews/{asin}">{review_nb}</a>
+            </div>
+          </div>
+        </div>
+      </div>
+    </li>"""),
+    'desktop_2': ('<div class="s-result-list s-search-results sg-row">\n{}\n</div>', """    <div class="s-result-item" data-asin="{asin}">
+      <div class="sg-col-inner">
+        <div class="sg-row">
+          <div class="sg-col-4-of-12">
+            <a class="a-link-normal" href="/{slug}/dp/{asin}"><img src="https://m.media-amazon.com/images/I/{asin}._AC_UY218_.jpg"></a>
+          </div>
+          <div class="sg-col-8-of-12">
+            <h5><span>{title}</span></h5>
+            <div class="a-section a-spacing-none a-spacing-top-mini">
+              <i class="a-icon a-icon-star-small"><span class="a-icon-alt">{rating} out of 5 stars</span></i>
+              <span class="a-size-small">{review_nb}</span>
+            </div>
+            <div class="a-row"><span class="a-price"><span class="a-offscreen">${price}</span></span></div>
+          </div>
+        </div>
+      </div>
+    </div>"""),
+}
+
+_ROBOT_CHECK_PAGE = "<!doctype html><html><head><title>Robot Check</title></head><body></body></html>"
+_SIGN_IN_PAGE = ("<!doctype html><html><head><title>Amazon.com</title></head>"
+                 "<body><h1>Sign in for the best experience</h1></body></html>")
+
+
+def render_page(keywords, page, layout='mobile', page_nb=_DEFAULT_PAGE_NB,
+                products_per_page=_DEFAULT_PRODUCTS_PER_PAGE, sponsored_nb=0):
+    """Return a result page of a layout, its products depending only on the
+    keywords and the page number. The pages after the first one start with
+    the `sponsored_nb` first products again, like the sponsored items."""
+    product_list_template, product_template = _LAYOUT_TEMPLATES[layout]
+    product_nbs = list(range(1, sponsored_nb + 1)) if page > 1 else []
+    product_nbs.extend(range((page - 1) * products_per_page + 1, page * products_per_page + 1))
+    products = []
+    for product_nb in product_nbs:
+        products.append(product_template.format(
+            slug=f"{quote_plus(keywords)}-product-{product_nb}",
+            asin=f"B{product_nb:09d}",
+            title=f"{keywords.title()} product {product_nb}",
+            rating=f"{1 + product_nb % 40 / 10:.1f}",
+            review_nb=f"{product_nb * 37:,}",
+            price=f"{5 + product_nb * 1.25:,.2f}"))
+    keywords_url = quote_plus(keywords)
+    next_page = (_NEXT_PAGE_TEMPLATE.format(keywords_url=keywords_url, page=page + 1)
+                 if page < page_nb else _LAST_PAGE)
+    return _PAGE_TEMPLATE.format(keywords=keywords, keywords_url=keywords_url, page=page,
+                                 products=product_list_template.format('\n'.join(products)),
+                                 next_page=next_page)
+
+
+class MockAmazonServer(object):
+    """Local HTTP server answering /s?k=<keywords>&page=<n> like Amazon.
+    `error_rate`, `robot_check_rate` and `sign_in_rate` are the shares of the
+    requests answered with a 503, a Robot Check page and a sign in page, all
+    the answers being sent after `latency` seconds. `sponsored_nb` products
+    are repeated at the top of every page after the first. `seed` makes the
+    sequence of answers reproducible."""
+    def __init__(self, layout='mobile', page_nb=_DEFAULT_PAGE_NB,
+                 products_per_page=_DEFAULT_PRODUCTS_PER_PAGE, latency=0.0,
+                 error_rate=0.0, robot_check_rate=0.0, sign_in_rate=0.0,
+                 sponsored_nb=0, seed=None, host='127.0.0.1', port=0):
+        if layout not in _LAYOUT_TEMPLATES:
+            raise ValueError(f"Unknown layout '{layout}' (available: {', '.join(_LAYOUT_TEMPLATES)})")
+        self.layout = layout
+        self.page_nb = page_nb
+        self.products_per_page = products_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.robot_check_rate = robot_check_rate
+        self.sign_in_rate = sign_in_rate
+        self.sponsored_nb = sponsored_nb
+        self.answers = Counter()
+        self.connection_nb = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), _handler_class(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def search_url(self, keywords):
+        """Return the URL of the first result page of a search."""
+        return f"{self.url}s?k={quote_plus(keywords)}"
+
+    def start(self):
+        """Serve the requests in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        kwargs={'poll_interval': _POLL_INTERVAL}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving the requests."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _draw_answer(self):
+        """Return the kind of answer to the next request."""
+        with self._lock:
+            draw = self._random.random()
+            for kind, rate in (('error', self.error_rate), ('robot_check', self.robot_check_rate),
+                               ('sign_in', self.sign_in_rate)):
+                if draw < rate:
+                    break
+                draw -= rate
+            else:
+                kind = 'page'
+            self.answers[kind] += 1
+            return kind
+
+    def answer(self, path):
+        """Return the (status code, HTML) answer to a request path."""
+        url = urlsplit(path)
+        query = parse_qs(url.query)
+        if url.path != '/s' or 'k' not in query:
+            return 404, "<html><body>Not found</body></html>"
+        try:
+            page = int(query.get('page', ['1'])[0])
+        except ValueError:
+            page = 0
+        if not 1 <= page <= self.page_nb:
+            return 404, "<html><body>Not found</body></html>"
+        kind = self._draw_answer()
+        if kind == 'error':
+            return 503, "<html><body>Service Unavailable</body></html>"
+        if kind == 'robot_check':
+            return 200, _ROBOT_CHECK_PAGE
+        if kind == 'sign_in':
+            return 200, _SIGN_IN_PAGE
+        return 200, render_page(query['k'][0], page, self.layout, self.page_nb,
+                                self.products_per_page, self.sponsored_nb)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    """HTTP server ignoring the connections closed by the clients"""
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _handler_class(server):
+    """Return the request handler class of a MockAmazonServer."""
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # The headers and the body are sent separately: avoid the delayed ACK stalls
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with server._lock:
+                server.connection_nb += 1
+
+        def do_GET(self):
+            if server.latency:
+                time.sleep(server.latency)
+            status_code, html = server.answer(self.path)
+            body = html.encode('utf-8')
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except ConnectionError:  # The client stopped reading (streaming, abandoned prefetch...)
+                self.close_connection = True
+
+        def log_message(self, format, *args):
+            pass
+    return _Handler
+
+
+@click.command()
+@click.option('--layout', type=click.Choice(list(_LAYOUT_TEMPLATES)), default='mobile',
+              help='Layout of the result pages')
+@click.option('--pagenb', type=int, default=_DEFAULT_PAGE_NB, help='Number of result pages of a search')
+@click.option('--latency', type=float, default=0.0, help='Delay before each answer, in seconds')
+@click.option('--errorrate', type=float, default=0.0, help='Share of 503 answers')
+@click.option('--robotcheckrate', type=float, default=0.0, help='Share of Robot Check pages')
+@click.option('--signinrate', type=float, default=0.0, help='Share of sign in pages')
+@click.option('--sponsorednb', type=int, default=0,
+              help='Number of products repeated at the top of the pages after the first')
+@click.option('--port', type=int, default=8080, help='Port of the server')
+@click.option('--searches', type=int, default=0,
+              help='Number of searches to run against the server and measure (0: only serve)')
+@click.option('--parser', type=str, default=None, help='Parser backend of the measured searches')
+@click.option('--rate', type=float, default=0.0,
+              help='Initial rate limit of the measured searches, in requests/s (0: no limit nor backoff)')
+def main(layout, pagenb, latency, errorrate, robotcheckrate, signinrate, sponsorednb, port, searches,
+         parser, rate):
+    """ Serve Amazon-like result pages locally, or measure the client against them """
+    server = MockAmazonServer(layout=layout, page_nb=pagenb, latency=latency,
+                              error_rate=errorrate, robot_check_rate=robotcheckrate,
+                              sign_in_rate=signinrate, sponsored_nb=sponsorednb, port=port)
+    if not searches:
+        click.echo(f"Serving {layout} result pages on {server.search_url('python')}")
+        try:
+            server._httpd.serve_forever()
+        except KeyboardInterrupt:
+            server._httpd.server_close()
+        return
+
+    rate_limiter = RateLimiter(rate=rate) if rate else NoRateLimiter()
+    with server:
+        product_nb = failed_search_nb = 0
+        start = time.perf_counter()
+        for search_index in range(searches):
+            amz = AmazonClient(parser=parser, rate_limiter=rate_limiter)
+            try:
+                amz._get_products(search_url=server.search_url(f"search {search_index}"),
+                                  max_product_nb=pagenb * server.products_per_page)
+            except ValueError:  # No valid pages found after the retries
+                failed_search_nb += 1
+            product_nb += len(amz.product_dict_list)
+        seconds = time.perf_counter() - start
+    request_nb = sum(server.answers.values())
+    click.echo(f"{searches} searches ({failed_search_nb} failed), {request_nb} requests, "
+               f"{product_nb} products in {seconds:.2f} s: "
+               f"{request_nb / seconds:.1f} requests/s, {product_nb / seconds:.1f} products/s")
+    click.echo(', '.join(f"{kind}: {nb}" for kind, nb in sorted(server.answers.items())))
+
+
+if __name__ == "__main__":
+    main()
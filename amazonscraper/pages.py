@@ -0,0 +1,136 @@
+""" Retention policies of the raw HTML pages fetched by a client.
+
+By default, AmazonClient.html_pages keeps every page in memory. For long
+crawls, the pages can instead be dropped, limited to the last ones, or
+spilled to compressed files on disk. The last page is always available.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import weakref
+from collections import deque
+
+_DISK_COMPRESSION_LEVEL = 6
+
+
+class HtmlPages(object):
+    """Keep every page in memory (the default policy)"""
+    def __init__(self):
+        self._pages = []
+
+    def append(self, page):
+        """Store a new page."""
+        self._pages.append(page)
+
+    @property
+    def last(self):
+        """The last page stored ("" if none)."""
+        return self._pages[-1] if self._pages else ""
+
+    def __len__(self):
+        return len(self._pages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):  # A deque cannot be sliced
+            return [self._pages[i] for i in range(*index.indices(len(self._pages)))]
+        return self._pages[index]
+
+    def __iter__(self):
+        return iter(self._pages)
+
+
+class LastHtmlPages(HtmlPages):
+    """Keep only the last `page_nb` pages in memory
+    >>> pages = LastHtmlPages(2)
+    >>> for page in ['<html>1</html>', '<html>2</html>', '<html>3</html>']:
+    ...     pages.append(page)
+    >>> list(pages)
+    ['<html>2</html>', '<html>3</html>']
+    """
+    def __init__(self, page_nb):
+        self._pages = deque(maxlen=page_nb)
+
+
+class NoHtmlPages(HtmlPages):
+    """Keep no page, except the last one (for `last`)
+    >>> pages = NoHtmlPages()
+    >>> pages.append('<html>1</html>')
+    >>> len(pages), pages.last
+    (0, '<html>1</html>')
+    """
+    def __init__(self):
+        self._pages = []
+        self._last = ""
+
+    def append(self, page):
+        self._last = page
+
+    @property
+    def last(self):
+        return self._last
+
+
+class DiskHtmlPages(HtmlPages):
+    """Spill every page to a gzip file in `directory` (by default, a
+    temporary directory removed with the object)"""
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='amazonscraper-')
+            weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._page_nb = 0
+
+    def _path(self, index):
+        return os.path.join(self.directory, f'page_{index:05d}.html.gz')
+
+    def append(self, page):
+        with gzip.open(self._path(self._page_nb), 'wt', encoding='utf-8',
+                       compresslevel=_DISK_COMPRESSION_LEVEL) as f:
+            f.write(page)
+        self._page_nb += 1
+
+    @property
+    def last(self):
+        return self[-1] if self._page_nb else ""
+
+    def __len__(self):
+        return self._page_nb
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._page_nb))]
+        if index < 0:
+            index += self._page_nb
+        if not 0 <= index < self._page_nb:
+            raise IndexError('page index out of range')
+        with gzip.open(self._path(index), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def __iter__(self):
+        return (self[index] for index in range(self._page_nb))
+
+
+def get_html_pages(keep_html_pages='all'):
+    """Return the page store for a retention policy: 'all', 'none', the
+    number of last pages to keep, or 'disk'
+    >>> get_html_pages(3)._pages.maxlen
+    3
+    >>> get_html_pages('some')
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown HTML page retention policy 'some'
+    """
+    if isinstance(keep_html_pages, HtmlPages):
+        return keep_html_pages
+    if keep_html_pages == 'all':
+        return HtmlPages()
+    if keep_html_pages == 'none':
+        return NoHtmlPages()
+    if keep_html_pages == 'disk':
+        return DiskHtmlPages()
+    if isinstance(keep_html_pages, int) and keep_html_pages > 0:
+        return LastHtmlPages(keep_html_pages)
+    raise ValueError(f"Unknown HTML page retention policy '{keep_html_pages}'")
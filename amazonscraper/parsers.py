@@ -0,0 +1,227 @@
+""" HTML parser backends used to extract the products from the result pages.
+
+Every backend exposes the same small set of methods, working on the native
+nodes of its library (no wrapper objects), so that the extraction code in
+AmazonClient gives the same product dicts whatever the backend.
+"""
+import warnings
+from functools import lru_cache
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+except ImportError:  # lxml and cssselect are optional dependencies
+    lxml = None
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is an optional dependency
+    LexborHTMLParser = None
+
+_DEFAULT_BEAUTIFULSOUP_PARSER = "html.parser"
+
+
+class Parser(object):
+    """Base class of the parser backends"""
+    name = None
+
+    def parse(self, html_content):
+        """Parse an HTML page and return its root node."""
+        raise NotImplementedError
+
+    def select(self, node, selector):
+        """Return the descendants of node matching the CSS selector."""
+        raise NotImplementedError
+
+    def text(self, node):
+        """Return the text content of node and its descendants."""
+        raise NotImplementedError
+
+    def attr(self, node, name):
+        """Return the value of an attribute of node (None if missing)."""
+        raise NotImplementedError
+
+    def parent(self, node):
+        """Return the parent element of node."""
+        raise NotImplementedError
+
+    def html(self, node):
+        """Serialize node (and its descendants) to HTML."""
+        raise NotImplementedError
+
+    def strings(self, node):
+        """Yield the (text, parent element) pairs of the text nodes under node."""
+        raise NotImplementedError
+
+    def elements(self, node):
+        """Yield the descendant elements of node, in document order."""
+        raise NotImplementedError
+
+    def node_id(self, node):
+        """Return a hashable identifier of node, the same for every lookup
+        of this node in the parsed page."""
+        raise NotImplementedError
+
+
+class BeautifulSoupParser(Parser):
+    """Pure Python backend, based on BeautifulSoup (the default one)"""
+    name = "beautifulsoup"
+
+    def __init__(self, features=_DEFAULT_BEAUTIFULSOUP_PARSER):
+        self.features = features
+
+    def parse(self, html_content):
+        return BeautifulSoup(html_content, self.features)
+
+    def select(self, node, selector):
+        return node.select(selector)
+
+    def text(self, node):
+        return node.text
+
+    def attr(self, node, name):
+        return node.attrs.get(name)
+
+    def parent(self, node):
+        return node.parent
+
+    def html(self, node):
+        return str(node)
+
+    def strings(self, node):
+        for child in node.descendants:
+            if isinstance(child, NavigableString):
+                yield child, child.parent
+
+    def elements(self, node):
+        for child in node.descendants:
+            if isinstance(child, Tag):
+                yield child
+
+    def node_id(self, node):
+        # Not the tag itself, as tags compare equal when they have the same content
+        return id(node)
+
+
+class LxmlParser(Parser):
+    """C backend, based on lxml.html and cssselect"""
+    name = "lxml"
+
+    def __init__(self):
+        if lxml is None:
+            raise ImportError('LxmlParser requires lxml and cssselect (pip install lxml cssselect)')
+
+    def parse(self, html_content):
+        return lxml.html.fromstring(html_content)
+
+    def select(self, node, selector):
+        # Unlike BeautifulSoup, cssselect can return node itself
+        return [match for match in _lxml_css_selector(selector)(node) if match is not node]
+
+    def text(self, node):
+        return node.text_content()
+
+    def attr(self, node, name):
+        return node.get(name)
+
+    def parent(self, node):
+        return node.getparent()
+
+    def html(self, node):
+        return lxml.html.tostring(node, encoding="unicode", with_tail=False)
+
+    def strings(self, node):
+        # In lxml, a text node is either the .text of an element, or the
+        # .tail of one of its children
+        for event, element in etree.iterwalk(node, events=("start", "end")):
+            if event == "start":
+                if element.text:
+                    yield element.text, element
+            elif element is not node and element.tail:
+                yield element.tail, element.getparent()
+
+    def elements(self, node):
+        return node.iterdescendants()
+
+    def node_id(self, node):
+        # lxml returns the same proxy object for an element while it is referenced
+        return node
+
+
+class SelectolaxParser(Parser):
+    """C backend, based on selectolax and the lexbor engine"""
+    name = "selectolax"
+
+    def __init__(self):
+        if LexborHTMLParser is None:
+            raise ImportError('SelectolaxParser requires selectolax (pip install selectolax)')
+
+    def parse(self, html_content):
+        return LexborHTMLParser(html_content).root
+
+    def select(self, node, selector):
+        # Unlike BeautifulSoup, lexbor can return node itself
+        return [match for match in node.css(selector) if match.mem_id != node.mem_id]
+
+    def text(self, node):
+        return node.text(deep=True)
+
+    def attr(self, node, name):
+        return node.attributes.get(name)
+
+    def parent(self, node):
+        return node.parent
+
+    def html(self, node):
+        return node.html
+
+    def strings(self, node):
+        for child in node.traverse(include_text=True):
+            if child.is_text_node:
+                yield child.text(deep=False), child.parent
+
+    def elements(self, node):
+        children = node.traverse()
+        next(children)  # node itself
+        return children
+
+    def node_id(self, node):
+        return node.mem_id
+
+
+PARSERS = {
+    BeautifulSoupParser.name: BeautifulSoupParser,
+    LxmlParser.name: LxmlParser,
+    SelectolaxParser.name: SelectolaxParser,
+}
+
+
+def get_parser(parser=None):
+    """Return a parser backend from its name (or the default one if None).
+    If the library of the backend is not installed, fall back to BeautifulSoup
+    >>> get_parser().name
+    'beautifulsoup'
+    >>> get_parser('html5')
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown parser 'html5' (available: beautifulsoup, lxml, selectolax)
+    """
+    if parser is None:
+        return BeautifulSoupParser()
+    if not isinstance(parser, str):
+        return parser  # Already a parser backend
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser '{parser}' (available: {', '.join(PARSERS)})")
+    try:
+        return PARSERS[parser]()
+    except ImportError as error:
+        warnings.warn(f"Parser '{parser}' unavailable ({error}), falling back to BeautifulSoup")
+        return BeautifulSoupParser()
+
+
+@lru_cache(maxsize=None)
+def _lxml_css_selector(selector):
+    """Compile a CSS selector to an lxml XPath, once per selector."""
+    return CSSSelector(selector, translator="html")
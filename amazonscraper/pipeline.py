@@ -0,0 +1,112 @@
+""" Parsing of the result pages in a pool of worker processes.
+
+The clients download the pages in their own thread, and hand the raw HTML
+over to a ParsingPool, so that the BeautifulSoup work of many searches is
+spread over every core instead of being capped by the GIL.
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from amazonscraper.client import AmazonClient
+
+# Pages waiting for a parser worker (or being parsed), per worker
+_PENDING_PAGES_PER_WORKER = 2
+# Pages downloaded ahead of the parser, per search
+_DEFAULT_LOOKAHEAD = 2
+
+
+class ParsingPool(object):
+    """Process pool parsing result pages, shared by any number of clients.
+
+    At most `max_pending_pages` pages can be queued or being parsed at the
+    same time: past this limit, the clients block before submitting a page,
+    which stops them from downloading more pages than the workers can parse.
+    Field extractors registered at runtime are only known by the workers if
+    they are forked (the default start method on Linux).
+    """
+    def __init__(self, workers=None, max_pending_pages=None):
+        workers = workers or os.cpu_count()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self._pending_pages = threading.BoundedSemaphore(
+            max_pending_pages or workers * _PENDING_PAGES_PER_WORKER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes."""
+        self.executor.shutdown(cancel_futures=True)
+
+    def submit(self, html_content, search_url, parser, max_product_nb):
+        """Queue a page for parsing, blocking while the queue is full.
+        Return a future of the (product dicts, next page URL) pair."""
+        self._pending_pages.acquire()
+        try:
+            future = self.executor.submit(_parse_page, html_content, search_url, parser, max_product_nb)
+        except BaseException:
+            self._pending_pages.release()
+            raise
+        future.add_done_callback(lambda _: self._pending_pages.release())
+        return future
+
+
+class PipelinedAmazonClient(AmazonClient):
+    """AmazonClient parsing its pages in a ParsingPool.
+
+    While the pool parses a page, the client keeps downloading the next ones
+    (up to `lookahead` pages), following the next page URL found in the raw
+    HTML. Pages downloaded after a wrong guess are dropped.
+    """
+    def __init__(self, pool, lookahead=_DEFAULT_LOOKAHEAD, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.lookahead = lookahead
+
+    def _get_products(self, keywords="", search_url="", max_product_nb=100, prefetch=False):
+        """Get products from Amazon based on search keywords."""
+        if not search_url:
+            search_url = self._get_search_url(keywords)
+        self._update_headers(search_url)
+        search_url = self._resume_checkpoint(search_url)
+        if not search_url or len(self.product_dict_list) >= max_product_nb:
+            return self.product_dict_list
+        parsed_pages = deque()  # (page URL, page, guessed next page URL, future) tuples
+        while True:
+            if search_url and len(parsed_pages) < self.lookahead:
+                page = self._get_page_html(search_url)
+                parsed_pages.append((search_url, page, self._guess_next_page_url(page),
+                                     self.pool.submit(page, search_url, self.parser,
+                                                      self._page_product_nb(max_product_nb))))
+                search_url = parsed_pages[-1][2]
+                continue
+            if not parsed_pages:
+                break
+            page_url, page, guessed_url, parsed_page = parsed_pages.popleft()
+            self.html_pages.append(page)
+            product_dict_list, next_page_url = parsed_page.result()
+            self._add_page(product_dict_list, next_page_url, max_product_nb, page_url)
+            if not next_page_url or len(self.product_dict_list) >= max_product_nb:
+                break
+            if next_page_url != guessed_url:
+                self._drop_pages(parsed_pages)
+                search_url = next_page_url
+        self._drop_pages(parsed_pages)
+        return self.product_dict_list
+
+    def _drop_pages(self, parsed_pages):
+        """Forget the pages downloaded ahead that will not be used."""
+        for _, _, _, parsed_page in parsed_pages:
+            parsed_page.cancel()
+        parsed_pages.clear()
+
+
+def _parse_page(html_content, search_url, parser, max_product_nb):
+    """Worker side: return the product dicts and the next page URL of a page."""
+    amz = AmazonClient(parser=parser)
+    amz._update_headers(search_url)
+    return amz._parse_products(html_content, max_product_nb)
@@ -0,0 +1,146 @@
+""" Record and replay of the raw answers of Amazon.
+
+A PageArchive is a gzip file of JSON lines, one per answer (URL, status
+code, headers and page). RecordingAdapter writes every answer received by
+a requests session to an archive, and ReplayAdapter serves them back in
+the same order, without the network:
+
+    client = AmazonClient(archive=PageArchive("python.jsonl.gz"))
+    client._get_products("Python")  # Live, recorded
+    client = AmazonClient(archive=PageArchive("python.jsonl.gz"), replay=True)
+    client._get_products("Python")  # Replayed
+"""
+import gzip
+import json
+import os
+import threading
+from collections import defaultdict
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from amazonscraper.cache import _normalize_url
+
+_COMPRESSION_LEVEL = 6
+_RECORDED_HEADERS = ('Content-Type', 'Date', 'Location')
+
+
+class PageArchive(object):
+    """Archive of the answers to the requests, stored in the gzip file `path`"""
+    def __init__(self, path):
+        self.path = path
+        self._records = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        records = defaultdict(list)
+        if os.path.exists(self.path):
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    records[_normalize_url(record['url'])].append(record)
+        return records
+
+    @property
+    def records(self):
+        """The recorded answers, by normalized URL, in the recording order."""
+        with self._lock:
+            if self._records is None:
+                self._records = self._load()
+            return self._records
+
+    def record(self, url, status_code, headers, text):
+        """Append an answer to the archive."""
+        record = {'url': url, 'status_code': status_code,
+                  'headers': {name: headers[name] for name in _RECORDED_HEADERS if name in headers},
+                  'text': text}
+        with self._lock:
+            # Each call appends a gzip member, read back as one stream
+            with gzip.open(self.path, 'at', encoding='utf-8',
+                           compresslevel=_COMPRESSION_LEVEL) as f:
+                f.write(json.dumps(record) + '\n')
+            if self._records is not None:
+                self._records[_normalize_url(url)].append(record)
+
+    def __len__(self):
+        return sum(len(records) for records in self.records.values())
+
+
+class RecordingAdapter(BaseAdapter):
+    """requests transport adapter sending the requests with `adapter` (an
+    HTTPAdapter by default), and recording the answers in `archive`. The
+    requests without a timeout get `timeout` (seconds) if given."""
+    def __init__(self, archive, adapter=None, timeout=None):
+        super().__init__()
+        self.archive = archive
+        self.adapter = adapter if adapter is not None else HTTPAdapter()
+        self.timeout = timeout
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None and self.timeout is not None:
+            kwargs['timeout'] = self.timeout
+        response = self.adapter.send(request, **kwargs)
+        self.archive.record(request.url, response.status_code, response.headers, response.text)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport adapter answering the requests from `archive`.
+    The answers to the same URL are served in the recording order, the last
+    one being repeated. A request which was not recorded raises a
+    requests ConnectionError."""
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        url = _normalize_url(request.url)
+        records = self.archive.records.get(url)
+        if not records:
+            raise requests.exceptions.ConnectionError(f'No recorded answer for {request.url}',
+                                                      request=request)
+        with self._lock:
+            record = records[min(self._served[url], len(records) - 1)]
+            self._served[url] += 1
+        response = requests.Response()
+        response.status_code = record['status_code']
+        response.headers = CaseInsensitiveDict(record['headers'])
+        response._content = record['text'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def archive_session(archive, replay=False, session=None):
+    """Return a new requests session recording its answers in archive, or
+    with `replay`, answering its requests from archive. The recorded
+    requests are sent through the adapters (and their connection pools) of
+    `session` if given, which is not modified."""
+    recording_session = requests.Session()
+    if session is not None:
+        recording_session.headers = session.headers
+    if replay:
+        mount_archive(recording_session, archive, replay=True)
+        return recording_session
+    for prefix in ('http://', 'https://'):
+        adapter = session.get_adapter(prefix) if session is not None else None
+        recording_session.mount(prefix, RecordingAdapter(archive, adapter, getattr(session, 'timeout', None)))
+    return recording_session
+
+
+def mount_archive(session, archive, replay=False):
+    """Record the answers received by a requests session in archive, or
+    with `replay`, answer its requests from archive."""
+    adapter = ReplayAdapter(archive) if replay else RecordingAdapter(archive)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
@@ -0,0 +1,114 @@
+""" Request throttling: per-domain token buckets and retry backoff.
+
+The rate of each Amazon domain adapts to how it answers: it is halved when
+a throttling answer comes back (a "Robot Check" page, a 503...), and
+increases slowly again with every valid page.
+"""
+import random
+import threading
+import time
+
+# Requests per second, per domain
+_DEFAULT_RATE = 5.0
+_MIN_RATE = 0.1
+_MAX_RATE = 20.0
+_RATE_INCREASE = 0.1  # After each valid page
+_RATE_DECREASE_FACTOR = 0.5  # After each throttling answer
+_DEFAULT_BURST = 10
+
+# Delay before the n-th retry: _BACKOFF_BASE * 2**(n-1) seconds, capped,
+# of which the second half is random
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 60.0
+
+
+class TokenBucket(object):
+    """Allow `rate` requests per second on average, with bursts of `capacity`"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._timestamp) * self.rate)
+        self._timestamp = now
+
+    def reserve(self):
+        """Take a token, and return how long to wait (in seconds) before using it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def set_rate(self, rate):
+        """Change the rate, the tokens accumulated so far being kept."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+class RateLimiter(object):
+    """Adaptive token bucket rate limiter, with one bucket per domain.
+    Share the same RateLimiter between clients to share their rate limits."""
+    def __init__(self, rate=_DEFAULT_RATE, burst=_DEFAULT_BURST,
+                 min_rate=_MIN_RATE, max_rate=_MAX_RATE):
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, domain):
+        """Return the token bucket of a domain."""
+        with self._lock:
+            if domain not in self._buckets:
+                self._buckets[domain] = TokenBucket(self.initial_rate, self.burst)
+            return self._buckets[domain]
+
+    def rate(self, domain):
+        """Return the current rate of a domain, in requests per second."""
+        return self.bucket(domain).rate
+
+    def reserve(self, domain):
+        """Take a token for a request to domain, and return how long to wait before sending it."""
+        return self.bucket(domain).reserve()
+
+    def wait(self, domain):
+        """Block until a request to domain can be sent, and return the delay."""
+        delay = self.reserve(domain)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def on_success(self, domain):
+        """Loosen the rate of domain after a valid page."""
+        bucket = self.bucket(domain)
+        bucket.set_rate(min(self.max_rate, bucket.rate + _RATE_INCREASE))
+
+    def on_throttled(self, domain):
+        """Tighten the rate of domain after a throttling answer."""
+        bucket = self.bucket(domain)
+        bucket.set_rate(max(self.min_rate, bucket.rate * _RATE_DECREASE_FACTOR))
+
+    def backoff_delay(self, trial):
+        """Return the delay before retrying after the trial-th failed request.
+        >>> limiter = RateLimiter()
+        >>> all(1.0 <= limiter.backoff_delay(2) <= 2.0 for _ in range(100))
+        True
+        """
+        delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (trial - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+class NoRateLimiter(RateLimiter):
+    """Rate limiter never waiting, for answers which do not come from
+    Amazon (replayed archives, local servers...)"""
+    def reserve(self, domain):
+        return 0.0
+
+    def backoff_delay(self, trial):
+        return 0.0
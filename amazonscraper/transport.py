@@ -0,0 +1,96 @@
+""" Long-lived HTTP transport shared by the clients and searches.
+
+A Transport is a requests session with a tuned connection pool. Share one
+between the AmazonClient instances or search() calls, so that the
+connections (and their DNS lookups and TLS handshakes) are reused instead
+of being set up again for each search:
+
+    transport = Transport(pool_maxsize=20)
+    for keywords in keywords_list:
+        amazonscraper.search(keywords, transport=transport)
+
+HTTP2Transport sends the requests with HTTP/2 (through httpx), so that the
+concurrent requests to a domain are multiplexed over one connection, with
+compressed headers.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # httpx is an optional dependency
+    httpx = None
+
+# Number of hosts whose connection pool is kept (one per Amazon domain)
+_DEFAULT_POOL_HOSTS = 10
+# Number of connections kept alive per host
+_DEFAULT_POOL_MAXSIZE = 10
+_DEFAULT_TIMEOUT = 30  # seconds
+
+
+class Transport(requests.Session):
+    """requests session keeping up to `pool_maxsize` connections alive for
+    each of `pool_hosts` hosts (with `pool_block`, the requests wait for a
+    free connection instead of opening extra ones). Without `keep_alive`,
+    each connection is closed after its request. `timeout` is the default
+    timeout of the requests, in seconds."""
+    def __init__(self, pool_hosts=_DEFAULT_POOL_HOSTS, pool_maxsize=_DEFAULT_POOL_MAXSIZE,
+                 pool_block=False, keep_alive=True, timeout=_DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class HTTP2Transport(object):
+    """Transport sending the requests with HTTP/2 when the server supports
+    it (HTTP/1.1 otherwise), over at most `max_connections` connections.
+    It can be shared by clients running in several threads: their requests
+    to a domain are multiplexed over the same connection. The httpx errors
+    are raised as the matching requests exceptions, as with Transport.
+    Recording or replaying page archives, and the streaming mode of the
+    clients, are not supported (the clients raise ValueError)."""
+    def __init__(self, max_connections=_DEFAULT_POOL_MAXSIZE, keep_alive=True,
+                 timeout=_DEFAULT_TIMEOUT):
+        if httpx is None:
+            raise ImportError('HTTP2Transport requires httpx (pip install httpx[http2])')
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections if keep_alive else 0)
+        self.client = httpx.Client(http2=True, limits=limits, timeout=timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the connections."""
+        self.client.close()
+
+    def get(self, url, headers=None, timeout=None):
+        """Send a GET request, and return the httpx response (which has
+        the status_code, text and content of a requests response)."""
+        kwargs = {'headers': _http2_headers(headers)}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        try:
+            return self.client.get(url, **kwargs)
+        except httpx.TimeoutException as error:
+            raise requests.exceptions.Timeout(str(error))
+        except httpx.TransportError as error:
+            raise requests.exceptions.ConnectionError(str(error))
+
+
+def _http2_headers(headers):
+    """Return the request headers without Host, replaced by the :authority
+    pseudo-header in HTTP/2 (httpx sets it from the URL)."""
+    return {name: value for name, value in (headers or {}).items() if name.lower() != 'host'}
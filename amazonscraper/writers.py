@@ -0,0 +1,95 @@
+""" Incremental output of the products, page by page.
+
+A writer given to a search receives the products of each result page as
+soon as the page is parsed, and flushes them to its file: a long crawl
+leaves a usable partial output if it fails, and with iter_search() the
+memory use stays constant:
+
+    with CSVWriter("python.csv") as writer:
+        for _ in amazonscraper.iter_search("Python", max_product_nb=10000, writer=writer):
+            pass
+"""
+import csv
+import io
+import json
+import threading
+
+
+class ProductWriter(object):
+    """Base class of the writers, writing to the file path, or to an open
+    file object (left open by close()). A writer can be shared by searches
+    running in several threads."""
+    def __init__(self, file):
+        if isinstance(file, str):
+            self.file = open(file, 'w', newline='', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self.file = file
+            self._owns_file = False
+        self.product_nb = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_page(self, product_dict_list):
+        """Write the products of a page, and flush them to the file."""
+        with self._lock:
+            for product_dict in product_dict_list:
+                self._write_product(product_dict)
+            self.file.flush()
+            self.product_nb += len(product_dict_list)
+
+    def _write_product(self, product_dict):
+        raise NotImplementedError
+
+    def close(self):
+        """Close the file if it was opened by the writer."""
+        if self._owns_file:
+            self.file.close()
+
+
+class CSVWriter(ProductWriter):
+    """Write the products as CSV, with a header of the field names: the
+    `fields` given, or the ones of the first product (the fields missing
+    from a product are left empty, and the unknown ones are dropped)
+    >>> output = io.StringIO()
+    >>> writer = CSVWriter(output, separator=';')
+    >>> writer.write_page([{'title': 'Book title', 'rating': 4.2}, {'title': 'Book, 2nd edition'}])
+    >>> print(output.getvalue())
+    title;rating
+    Book title;4.2
+    Book, 2nd edition;
+    <BLANKLINE>
+    """
+    def __init__(self, file, separator=",", fields=None):
+        super().__init__(file)
+        self.separator = separator
+        self.fields = fields
+        self._writer = None
+
+    def _write_product(self, product_dict):
+        if self._writer is None:
+            if self.fields is None:
+                self.fields = list(product_dict)
+            self._writer = csv.DictWriter(self.file, self.fields, restval='', extrasaction='ignore',
+                                          delimiter=self.separator, lineterminator='\n')
+            self._writer.writeheader()
+        self._writer.writerow(product_dict)
+
+
+class JSONLinesWriter(ProductWriter):
+    """Write each product as a JSON object on its own line (NaN values,
+    which are not valid JSON, are written as null)
+    >>> output = io.StringIO()
+    >>> JSONLinesWriter(output).write_page([{'title': 'Book title', 'rating': float('nan')}])
+    >>> print(output.getvalue())
+    {"title": "Book title", "rating": null}
+    <BLANKLINE>
+    """
+    def _write_product(self, product_dict):
+        self.file.write(json.dumps({field: None if value != value else value
+                                    for field, value in product_dict.items()}) + '\n')
@@ -0,0 +1,4 @@
+try:
+    import numpy  # noqa: F401
+except ImportError:  # numpy is an optional dependency, required by the doctests of the columnar module
+    collect_ignore = ["amazonscraper/columnar.py"]
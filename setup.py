@@ -41,8 +41,16 @@ setup(
     keywords=_MOTS_CLES,
     setup_requires=requirements,
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.5'],
+        'lxml': ['lxml', 'cssselect'],
+        'selectolax': ['selectolax'],
+        'http2': ['httpx[http2]'],
+        'numpy': ['numpy'],
+        'parquet': ['pyarrow'],
+    },
     classifiers=['Programming Language :: Python :: 3'],
-    python_requires='>=3',
+    python_requires='>=3.9',
     tests_require=['pytest'],
 )
 
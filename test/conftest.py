@@ -0,0 +1,15 @@
+import importlib.util
+import os
+
+import pytest
+
+_AMAZON2CSV_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'amazon2csv.py')
+
+
+@pytest.fixture
+def amazon2csv():
+    """The amazon2csv.py script, loaded as a module (it is not in a package)"""
+    spec = importlib.util.spec_from_file_location('amazon2csv', _AMAZON2CSV_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,77 @@
+import asyncio
+import os
+
+import pytest
+
+import amazonscraper
+from amazonscraper.aio import AsyncAmazonClient
+from amazonscraper.checkpoint import Checkpoint
+from amazonscraper.client import AmazonClient
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.replay import PageArchive
+from amazonscraper.throttle import NoRateLimiter
+
+web = pytest.importorskip("aiohttp.web")
+
+_SEARCH_PAGE = os.path.join(os.path.dirname(__file__), "search_mobile.html")
+
+
+async def _serve_search_page(requests_log):
+    async def handler(request):
+        requests_log.append(request.path_qs)
+        with open(_SEARCH_PAGE) as f:
+            return web.Response(text=f.read(), content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/s", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/s?k="
+
+
+def test_asearch_concurrent_searches():
+    requests_log = []
+
+    async def main():
+        runner, base_url = await _serve_search_page(requests_log)
+        try:
+            semaphore = asyncio.Semaphore(2)
+            return await asyncio.gather(*[
+                amazonscraper.asearch(search_url=base_url + str(i),
+                                      max_product_nb=2,
+                                      semaphore=semaphore)
+                for i in range(5)])
+        finally:
+            await runner.cleanup()
+
+    results = asyncio.run(main())
+
+    assert len(requests_log) == 5
+    for products in results:
+        assert isinstance(products, amazonscraper.Products)
+        assert len(products) == 2
+        assert products[0].title.startswith("Python Crash Course")
+        assert products[1].rating == 4.7
+
+
+def test_async_client_checkpoint(tmpdir):
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+
+    async def crawl(search_url):
+        async with AsyncAmazonClient(rate_limiter=NoRateLimiter(), checkpoint=checkpoint) as amz:
+            return await amz._get_products(search_url=search_url, max_product_nb=4)
+
+    with MockAmazonServer(page_nb=3, products_per_page=3) as server:
+        assert len(asyncio.run(crawl(server.search_url("python")))) == 4
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), checkpoint=checkpoint)
+        products = amz._get_products(search_url=server.search_url("python"), max_product_nb=6)
+
+    assert [product['asin'] for product in products] == [f"B{index:09d}" for index in range(1, 7)]
+
+
+def test_async_client_rejects_archive(tmpdir):
+    with pytest.raises(ValueError):
+        AsyncAmazonClient(archive=PageArchive(str(tmpdir.join("archive.jsonl.gz"))))
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+from click.testing import CliRunner
+
+import amazonscraper
+from amazonscraper import Products, ProductTable
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+_PRODUCT_DICTS = [
+    {'title': 'Learning Python', 'rating': 4.5, 'review_nb': 1102, 'img': 'https://img/51R.jpg',
+     'url': 'https://www.amazon.com/dp/1449355730', 'asin': '1449355730',
+     'prices_per_unit': float('nan'), 'units': float('nan'), 'prices_main': '49.99, 44.99'},
+    {'title': 'Fluent Python', 'rating': float('nan'), 'review_nb': float('nan'), 'img': '',
+     'url': 'https://www.amazon.com/dp/1492056359', 'asin': '1492056359',
+     'prices_per_unit': 1.5, 'units': 'Ounce', 'prices_main': 39.99, 'badge': 'Best seller'},
+]
+
+
+def test_to_arrow():
+    table = Products(_PRODUCT_DICTS).to_arrow()
+
+    assert table.schema.field('rating').type == pa.float64()
+    assert table.schema.field('review_nb').type == pa.int64()
+    assert table.schema.field('prices_main').type == pa.list_(pa.float64())
+    assert table.column_names[-1] == 'badge'
+    rows = table.to_pylist()
+    assert rows[0]['prices_main'] == [44.99, 49.99] and rows[0]['units'] is None
+    assert rows[0]['badge'] is None and rows[1]['badge'] == 'Best seller'
+    assert rows[1]['rating'] is None and rows[1]['review_nb'] is None
+    assert rows[1]['units'] == ['Ounce'] and rows[1]['img'] is None
+
+
+def test_to_parquet(tmpdir):
+    path = str(tmpdir.join("python.parquet"))
+    Products(_PRODUCT_DICTS).to_parquet(path)
+
+    table = pq.read_table(path)
+    assert table.num_rows == 2
+    assert table.column('review_nb').to_pylist() == [1102, None]
+    assert math.isclose(table.column('rating')[0].as_py(), 4.5)
+
+
+def test_amazon2csv_parquet(tmpdir, monkeypatch, amazon2csv):
+    monkeypatch.setattr(amazonscraper, 'search', lambda **kwargs: Products(_PRODUCT_DICTS))
+    path = str(tmpdir.join("python.parquet"))
+
+    result = CliRunner().invoke(amazon2csv.main, ['-k', 'python', '--outputformat', 'parquet', '--outputfile', path])
+    assert result.exit_code == 0, result.output
+    assert pq.read_table(path).column('asin').to_pylist() == ['1449355730', '1492056359']
+    result = CliRunner().invoke(amazon2csv.main, ['-k', 'python', '--outputformat', 'parquet'])
+    assert result.exit_code == 2
+
+
+def test_product_table_to_arrow():
+    pytest.importorskip("numpy")
+    products = ProductTable.from_products(_PRODUCT_DICTS).to_products()
+
+    assert products[0].review_nb == 1102 and isinstance(products[0].review_nb, int)
+    assert products.to_arrow().column('review_nb').to_pylist() == [1102, None]
@@ -0,0 +1,26 @@
+import glob
+import os
+
+from amazonscraper.bench import load_corpus, run_benchmark
+from amazonscraper.client import CSS_SELECTORS
+from amazonscraper.replay import PageArchive
+
+_TEST_DIR = os.path.dirname(__file__)
+_CORPUS = sorted(glob.glob(os.path.join(_TEST_DIR, "search_*.html")))
+
+
+def test_corpus_covers_all_layouts():
+    result = run_benchmark(load_corpus(_CORPUS), "beautifulsoup", repeat=2)
+
+    assert result['layouts'] == {layout: 1 for layout in CSS_SELECTORS}
+    assert result['pages'] == 8
+    assert result['products'] == 2 * 11
+    assert result['pages_per_sec'] > 0 and result['python_peak'] > 0
+
+
+def test_load_corpus_from_archive(tmpdir):
+    archive = PageArchive(str(tmpdir.join("archive.jsonl.gz")))
+    archive.record("https://www.amazon.com/s?k=python", 503, {}, "Busy")
+    archive.record("https://www.amazon.com/s?k=python", 200, {}, "<html></html>")
+
+    assert load_corpus([str(tmpdir)]) == [("https://www.amazon.com/s?k=python", "<html></html>")]
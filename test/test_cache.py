@@ -0,0 +1,107 @@
+import os
+
+from amazonscraper.cache import ResponseCache
+from amazonscraper.client import AmazonClient
+from amazonscraper.throttle import RateLimiter
+
+_TEST_DIR = os.path.dirname(__file__)
+_SEARCH_URL = "https://www.amazon.com/s?k=python"
+_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+
+class _Response(object):
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _CountingSession(object):
+    """requests session always answering the same page"""
+    def __init__(self, text):
+        self.text = text
+        self.urls = []
+
+    def get(self, url, headers):
+        self.urls.append(url)
+        return _Response(self.text)
+
+
+def _page():
+    with open(os.path.join(_TEST_DIR, "search_mobile.html")) as f:
+        return f.read()
+
+
+def test_cache_hit_and_miss(tmpdir):
+    cache = ResponseCache(str(tmpdir))
+    assert cache.get(_SEARCH_URL, _HEADERS) is None
+
+    cache.put(_SEARCH_URL, _HEADERS, "<html>é</html>")
+    assert cache.get("https://WWW.amazon.com/s?k=python#top", _HEADERS) == "<html>é</html>"
+    # The page depends on the User-Agent
+    assert cache.get(_SEARCH_URL, {'User-Agent': 'Other'}) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_cache_ttl(tmpdir):
+    cache = ResponseCache(str(tmpdir), ttl=-1)
+    cache.put(_SEARCH_URL, _HEADERS, "<html></html>")
+
+    assert cache.get(_SEARCH_URL, _HEADERS) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_cache_stores_same_content_once(tmpdir):
+    cache = ResponseCache(str(tmpdir))
+    cache.put(_SEARCH_URL, _HEADERS, _page())
+    cache.put(_SEARCH_URL + "&ref=nb", _HEADERS, _page())
+
+    object_files = [name for _, _, names in os.walk(os.path.join(str(tmpdir), 'objects')) for name in names]
+    assert cache.stats()['entries'] == 2
+    assert len(object_files) == 1
+
+
+def _object_files_size(directory):
+    return sum(os.path.getsize(os.path.join(path, name))
+               for path, _, names in os.walk(os.path.join(directory, 'objects')) for name in names)
+
+
+def test_cache_deletes_replaced_and_expired_pages(tmpdir):
+    cache = ResponseCache(str(tmpdir), max_size=2000)
+    for refresh_index in range(30):
+        cache.put(_SEARCH_URL, _HEADERS, f"<html>{refresh_index}</html>" * 100)
+    assert _object_files_size(str(tmpdir)) == cache.stats()['size'] <= 2000
+
+    cache.ttl = -1
+    assert cache.get(_SEARCH_URL, _HEADERS) is None
+    assert _object_files_size(str(tmpdir)) == cache.stats()['size'] == 0
+
+
+def test_cache_lru_eviction(tmpdir):
+    cache = ResponseCache(str(tmpdir))
+    for page_index in range(3):
+        cache.put(f"{_SEARCH_URL}&page={page_index}", _HEADERS, f"<html>{page_index}</html>" * 100)
+    cache.get(f"{_SEARCH_URL}&page=0", _HEADERS)
+    # Room for two of the pages only
+    cache.max_size = cache.stats()['size'] * 2 // 3
+    cache.put(f"{_SEARCH_URL}&page=0", _HEADERS, "<html>0</html>" * 100)
+
+    assert cache.get(f"{_SEARCH_URL}&page=1", _HEADERS) is None
+    assert cache.get(f"{_SEARCH_URL}&page=0", _HEADERS) is not None
+    assert cache.get(f"{_SEARCH_URL}&page=2", _HEADERS) is not None
+
+
+def test_client_reads_the_cache(tmpdir):
+    cache = ResponseCache(str(tmpdir))
+    products = []
+    for _ in range(2):
+        amz = AmazonClient(cache=cache, rate_limiter=RateLimiter())
+        amz.session = _CountingSession(_page())
+        amz._update_headers(_SEARCH_URL)
+        amz.headers['User-Agent'] = _HEADERS['User-Agent']
+        products.append(amz._parse_products(amz._get_page_html(_SEARCH_URL), 100)[0])
+
+    assert repr(products[0]) == repr(products[1])
+    # The second client did not send any request
+    assert amz.session.urls == []
+    assert cache.stats()['hits'] == 1
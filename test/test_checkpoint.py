@@ -0,0 +1,97 @@
+import pytest
+
+from amazonscraper.checkpoint import Checkpoint
+from amazonscraper.client import AmazonClient
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.pipeline import ParsingPool, PipelinedAmazonClient
+from amazonscraper.throttle import NoRateLimiter
+
+
+class _FailingServer(MockAmazonServer):
+    """MockAmazonServer answering 503 to the requests of page 3 while `failing`"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.failing = True
+        self.requested_paths = []
+
+    def answer(self, path):
+        self.requested_paths.append(path)
+        if self.failing and path.endswith("page=3"):
+            return 503, "<html><body>Service Unavailable</body></html>"
+        return super().answer(path)
+
+
+def _crawl(server, checkpoint, client_class=AmazonClient, *args, prefetch=False):
+    amz = client_class(*args, rate_limiter=NoRateLimiter(), checkpoint=checkpoint)
+    return amz._get_products(search_url=server.search_url("python"), prefetch=prefetch)
+
+
+def _asins(products):
+    return [product['asin'] for product in products]
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_crawl_resumes_from_checkpoint(tmpdir, prefetch):
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+    with _FailingServer(page_nb=5, products_per_page=2) as server:
+        with pytest.raises(ValueError):
+            _crawl(server, checkpoint, prefetch=prefetch)
+        next_page_url, products, skip_nb = checkpoint.load(server.search_url("python"))
+        assert next_page_url.endswith("page=3") and len(products) == 4 and skip_nb == 0
+
+        server.failing = False
+        server.requested_paths = []
+        products = _crawl(server, checkpoint, prefetch=prefetch)
+        assert server.requested_paths == [f"/s?k=python&page={page}" for page in (3, 4, 5)]
+        assert _asins(products) == [f"B{index:09d}" for index in range(1, 11)]
+
+        # The crawl is complete: nothing is requested again
+        server.requested_paths = []
+        assert len(_crawl(server, checkpoint, prefetch=prefetch)) == 10
+        assert server.requested_paths == []
+
+
+def test_pipelined_crawl_resumes_from_checkpoint(tmpdir):
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+    with ParsingPool(workers=1) as pool, _FailingServer(page_nb=4, products_per_page=2) as server:
+        with pytest.raises(ValueError):
+            _crawl(server, checkpoint, PipelinedAmazonClient, pool)
+        server.failing = False
+        products = _crawl(server, checkpoint, PipelinedAmazonClient, pool)
+
+    assert _asins(products) == [f"B{index:09d}" for index in range(1, 9)]
+
+
+@pytest.mark.parametrize("client_kwargs", [{}, {'prefetch': True}, {'pool': True}])
+def test_crawl_resumes_from_cut_page(tmpdir, client_kwargs):
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+    with ParsingPool(workers=1) as pool, MockAmazonServer(page_nb=3, products_per_page=3) as server:
+        def crawl(max_product_nb):
+            client = (PipelinedAmazonClient(pool, rate_limiter=NoRateLimiter(), checkpoint=checkpoint)
+                      if client_kwargs.get('pool') else AmazonClient(rate_limiter=NoRateLimiter(), checkpoint=checkpoint))
+            return client._get_products(search_url=server.search_url("python"), max_product_nb=max_product_nb,
+                                        prefetch=client_kwargs.get('prefetch', False))
+
+        assert len(crawl(4)) == 4
+        next_page_url, _, skip_nb = checkpoint.load(server.search_url("python"))
+        assert next_page_url.endswith("page=2") and skip_nb == 1
+        assert _asins(crawl(5)) == [f"B{index:09d}" for index in range(1, 6)]
+        assert _asins(crawl(8)) == [f"B{index:09d}" for index in range(1, 9)]
+
+
+def test_checkpoint_drops_cut_line(tmpdir):
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+    checkpoint.save_page("https://www.amazon.com/s?k=python", "https://www.amazon.com/s?k=python&page=2",
+                         [{'title': 'Python', 'rating': float('nan')}])
+    with open(checkpoint.path, "a") as f:
+        f.write('{"next_page_url": "https://www.amazon.com/s?k=python&page=3", "prod')
+
+    next_page_url, products, _ = checkpoint.load("https://www.amazon.com/s?k=python")
+    assert next_page_url == "https://www.amazon.com/s?k=python&page=2"
+    assert products[0]['title'] == 'Python'
+    checkpoint.save_page("https://www.amazon.com/s?k=python", None, [])
+    assert checkpoint.load("https://www.amazon.com/s?k=python")[0] is None
+    with pytest.raises(ValueError):
+        checkpoint.load("https://www.amazon.com/s?k=rust")
+    checkpoint.clear()
+    assert checkpoint.load("https://www.amazon.com/s?k=rust") is None
@@ -0,0 +1,139 @@
+import math
+import os
+
+from amazonscraper.client import AmazonClient, LayoutCache
+from amazonscraper.fields import FIELD_EXTRACTORS, register_field
+
+_TEST_DIR = os.path.dirname(__file__)
+_SEARCH_URL = "https://www.amazon.com/s?k=python"
+
+
+def _read_page(file_name):
+    with open(os.path.join(_TEST_DIR, file_name)) as f:
+        return f.read()
+
+
+class _OfflineClient(AmazonClient):
+    """AmazonClient serving pages from a {url: html} dict"""
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.requested_urls = []
+
+    def _get_page_html(self, search_url):
+        self.requested_urls.append(search_url)
+        return self.pages[search_url]
+
+
+def _two_pages():
+    first_page = _read_page("search_mobile.html")
+    last_page = first_page.replace('<li class="a-last">', '<li class="a-disabled">')
+    return {
+        _SEARCH_URL: first_page,
+        "https://www.amazon.com/s?k=python&page=2": last_page,
+    }
+
+
+def test_get_products_stops_on_last_page():
+    amz = _OfflineClient(_two_pages())
+    products = amz._get_products(search_url=_SEARCH_URL, max_product_nb=100)
+
+    assert len(products) == 6
+    assert len(amz.html_pages) == 2
+
+
+def test_get_products_prefetch():
+    amz = _OfflineClient(_two_pages())
+    products = amz._get_products(search_url=_SEARCH_URL, max_product_nb=5, prefetch=True)
+
+    expected = _OfflineClient(_two_pages())._get_products(search_url=_SEARCH_URL, max_product_nb=5)
+    assert [p["title"] for p in products] == [p["title"] for p in expected]
+    assert amz.requested_urls == [_SEARCH_URL, "https://www.amazon.com/s?k=python&page=2"]
+
+
+def test_no_prefetch_when_the_page_is_enough():
+    amz = _OfflineClient(_two_pages())
+    products = amz._get_products(search_url=_SEARCH_URL, max_product_nb=3, prefetch=True)
+
+    assert len(products) == 3
+    assert amz.requested_urls == [_SEARCH_URL]
+
+
+def test_change_user_agent_replaces_the_headers():
+    amz = AmazonClient()
+    headers = amz.headers  # Read by a request running in the prefetching thread
+    amz._change_user_agent()
+
+    assert amz.headers['User-Agent'] != headers['User-Agent']
+    assert dict(amz.headers, **{'User-Agent': headers['User-Agent']}) == headers
+
+
+def test_guess_next_page_url():
+    amz = AmazonClient()
+    amz._update_headers(_SEARCH_URL)
+    page = _read_page("search_mobile.html")
+
+    assert amz._guess_next_page_url(page) == "https://www.amazon.com/s?k=python&page=2"
+    assert amz._guess_next_page_url("<html></html>") is None
+
+
+def test_extract_page_missing_fields():
+    amz = AmazonClient()
+    amz._update_headers(_SEARCH_URL)
+    amz._extract_page('<ul id="resultItems"><li><a href="/dp/B000000001">'
+                      '<h5><span>No reviews yet</span></h5></a></li></ul>', max_product_nb=10)
+
+    product = amz.product_dict_list[0]
+    assert product["title"] == "No reviews yet"
+    assert product["asin"] == "B000000001"
+    assert product["img"] == ""
+    assert math.isnan(product["review_nb"])
+    assert math.isnan(product["rating"])
+
+
+def test_extract_page_registered_field():
+    @register_field("sponsored", selectors=["span.s-sponsored-label-text"])
+    def _extract_sponsored(client, product, nodes):
+        return {"sponsored": nodes[0] is not None}
+
+    try:
+        amz = AmazonClient()
+        amz._update_headers(_SEARCH_URL)
+        amz._extract_page('<ul id="resultItems">'
+                          '<li><span class="s-sponsored-label-text">Sponsored</span></li>'
+                          '<li><h5><span>Organic</span></h5></li></ul>', max_product_nb=10)
+    finally:
+        del FIELD_EXTRACTORS["sponsored"]
+
+    assert [p["sponsored"] for p in amz.product_dict_list] == [True, False]
+    assert list(amz.product_dict_list[0])[-1] == "sponsored"
+
+
+def test_layout_cache():
+    layout_cache = LayoutCache()
+    page = ('<div class="s-result-list sg-row"><div class="s-result-item">'
+            '<h5><span>Desktop product</span></h5></div></div>')
+    for _ in range(3):
+        amz = AmazonClient(layout_cache=layout_cache)
+        amz._update_headers(_SEARCH_URL)
+        amz._extract_page(page, max_product_nb=10)
+        assert amz.product_dict_list[0]["title"] == "Desktop product"
+
+    assert layout_cache.layout_order(("www.amazon.com", amz.headers["User-Agent"]))[0] == "desktop_2"
+    assert layout_cache.stats() == {
+        "mobile": {"hits": 0, "misses": 1},
+        "mobile_grid": {"hits": 0, "misses": 1},
+        "desktop": {"hits": 0, "misses": 1},
+        "desktop_2": {"hits": 3, "misses": 0},
+    }
+
+
+def test_iter_products_keeps_no_history():
+    amz = _OfflineClient(_two_pages())
+    products = amz._iter_products(search_url=_SEARCH_URL, max_product_nb=5)
+
+    assert next(products)["asin"] == "1593276036"
+    assert amz.requested_urls == [_SEARCH_URL]
+    assert len(list(products)) == 4
+    assert amz.product_dict_list == []
+    assert len(amz.html_pages) == 0
@@ -0,0 +1,56 @@
+import math
+
+import pytest
+
+from amazonscraper import Products, ProductTable
+
+np = pytest.importorskip("numpy")
+
+_PRODUCT_DICTS = [
+    {'title': 'Learning Python', 'rating': 4.5, 'review_nb': 1102, 'asin': '1449355730',
+     'prices_per_unit': float('nan'), 'units': float('nan'), 'prices_main': 44.99},
+    {'title': 'Fluent Python', 'rating': 4.7, 'review_nb': 850, 'asin': '1492056359',
+     'prices_per_unit': float('nan'), 'units': float('nan'), 'prices_main': '39.99, 49.99'},
+    {'title': 'Python Crash Course', 'rating': float('nan'), 'review_nb': float('nan'), 'asin': '1718502702',
+     'prices_per_unit': 1.5, 'units': 'Ounce', 'prices_main': float('nan')},
+    {'title': 'Automate the Boring Stuff with Python — 2nd Edition', 'rating': 4.7, 'review_nb': 12,
+     'asin': '1593279922'},
+]
+
+
+def test_columns():
+    table = ProductTable.from_products(Products(_PRODUCT_DICTS))
+
+    assert len(table) == 4
+    assert table['rating'].dtype == np.float64 and math.isnan(table['rating'][2])
+    assert table['prices_main'][1] == 39.99
+    assert list(table['title'])[3] == 'Automate the Boring Stuff with Python — 2nd Edition'
+    assert list(table['units']) == ['', '', 'Ounce', '']
+    assert table[-1].asin == '1593279922' and table[0].review_nb == 1102
+    assert [product.title for product in table.to_products()] == [d['title'] for d in _PRODUCT_DICTS]
+
+
+def test_filter_and_sort():
+    table = ProductTable.from_products(_PRODUCT_DICTS)
+
+    best = table.filter((table['rating'] >= 4.5) & (table['review_nb'] >= 100))
+    assert list(best['asin']) == ['1449355730', '1492056359']
+    assert list(table.sort('review_nb')['asin']) == ['1593279922', '1492056359', '1449355730', '1718502702']
+    assert list(table.sort('rating', descending=True)['asin']) == [
+        '1492056359', '1593279922', '1449355730', '1718502702']
+    assert list(table.sort('title', descending=True)['title'])[0] == 'Python Crash Course'
+    assert len(table[table['rating'] > 5]) == 0
+
+
+def test_aggregate():
+    table = ProductTable.from_products(_PRODUCT_DICTS)
+
+    assert table.aggregate('rating', 'count') == 3
+    assert table.aggregate('review_nb', 'sum') == 1964
+    assert table.aggregate('prices_main', 'min') == 39.99
+    assert math.isnan(table.filter(table['rating'] > 5).aggregate('rating', 'max'))
+    assert table.describe()['rating']['median'] == 4.7
+    with pytest.raises(ValueError):
+        table.aggregate('title')
+    with pytest.raises(ValueError):
+        table.aggregate('rating', 'mode')
@@ -0,0 +1,96 @@
+import math
+
+import amazonscraper
+from amazonscraper import AsinIndex
+from amazonscraper.checkpoint import Checkpoint
+from amazonscraper.client import AmazonClient
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.pipeline import ParsingPool, PipelinedAmazonClient
+from amazonscraper.throttle import NoRateLimiter
+from amazonscraper.transport import Transport
+
+
+def _asins(product_dict_list):
+    return [product_dict['asin'] for product_dict in product_dict_list]
+
+
+def test_sponsored_products_are_dropped():
+    index = AsinIndex()
+    with MockAmazonServer(page_nb=4, products_per_page=4, sponsored_nb=2) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), dedup=index)
+        product_dict_list = amz._get_products(search_url=server.search_url("python"), max_product_nb=10)
+        assert server.answers['page'] == 3
+
+    assert _asins(product_dict_list) == [f"B{index:09d}" for index in range(1, 11)]
+    assert index.stats() == {'products': 14, 'duplicates': 4, 'dedup_rate': 4 / 14}
+
+
+def test_duplicates_without_index():
+    with MockAmazonServer(page_nb=4, products_per_page=4, sponsored_nb=2) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter())
+        product_dict_list = amz._get_products(search_url=server.search_url("python"), max_product_nb=10)
+
+    assert len(set(_asins(product_dict_list))) == 8
+
+
+def test_pipelined_and_iterated_searches_drop_duplicates():
+    with MockAmazonServer(page_nb=3, products_per_page=3, sponsored_nb=1) as server:
+        with ParsingPool(workers=1) as pool:
+            amz = PipelinedAmazonClient(pool, rate_limiter=NoRateLimiter(), dedup=AsinIndex())
+            assert len(set(_asins(amz._get_products(search_url=server.search_url("python"))))) == 9
+        products = list(amazonscraper.iter_search(search_url=server.search_url("python"), dedup=AsinIndex()))
+    assert len({product.asin for product in products}) == len(products) == 9
+
+
+def test_index_shared_by_searches():
+    index = AsinIndex()
+    with MockAmazonServer(page_nb=2, products_per_page=3) as server:
+        # The products of the mock server only depend on their rank
+        results = list(amazonscraper.search_many([server.search_url("python"), server.search_url("rust")],
+                                                 workers=1, rate_limiter=NoRateLimiter(), dedup=index))
+    assert sorted(len(result.products) for result in results) == [0, 6]
+    assert index.dedup_rate == 0.5 and len(index) == 6
+
+
+class _FailingTransport(Transport):
+    """Transport failing on the second page of the "python" search"""
+    def request(self, method, url, **kwargs):
+        if "k=python" in url and "page=2" in url:
+            raise RuntimeError("Connection lost")
+        return super().request(method, url, **kwargs)
+
+
+def test_failed_search_keeps_its_products():
+    index = AsinIndex()
+    with MockAmazonServer(page_nb=2, products_per_page=3) as server:
+        results = list(amazonscraper.search_many([server.search_url("python"), server.search_url("rust")],
+                                                 workers=1, rate_limiter=NoRateLimiter(), dedup=index,
+                                                 transport=_FailingTransport()))
+    failed, = [result for result in results if result.error is not None]
+    succeeded, = [result for result in results if result.error is None]
+
+    assert str(failed.error) == "Connection lost" and len(failed.products) == 3
+    assert len(succeeded.products) == 3
+    assert len({product.asin for result in results for product in result.products}) == len(index) == 6
+
+
+def test_merge_fills_missing_fields():
+    index = AsinIndex(merge=True)
+    kept = index.filter([{'asin': 'A1', 'rating': float('nan'), 'img': ''}])
+    index.filter([{'asin': 'A1', 'rating': 4.5, 'img': 'https://img/A1.jpg', 'badge': 'Sponsored'}])
+
+    assert kept[0] == {'asin': 'A1', 'rating': 4.5, 'img': 'https://img/A1.jpg', 'badge': 'Sponsored'}
+    assert index.get('A1') is kept[0] and index.get('A2') is None
+    assert index.filter([{'title': 'No ASIN'}, {'title': 'No ASIN'}]) == [{'title': 'No ASIN'}] * 2
+    assert math.isclose(index.dedup_rate, 1 / 4)
+
+
+def test_resumed_products_are_indexed(tmpdir):
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+    with MockAmazonServer(page_nb=3, products_per_page=3, sponsored_nb=1) as server:
+        AmazonClient(rate_limiter=NoRateLimiter(), checkpoint=checkpoint, dedup=AsinIndex())._get_products(
+            search_url=server.search_url("python"), max_product_nb=3)
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), checkpoint=checkpoint, dedup=AsinIndex())
+        product_dict_list = amz._get_products(search_url=server.search_url("python"), max_product_nb=9)
+
+    assert _asins(product_dict_list) == [f"B{index:09d}" for index in range(1, 10)]
@@ -0,0 +1,44 @@
+import json
+import math
+import os
+
+import pytest
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.parsers import PARSERS
+
+_TEST_DIR = os.path.dirname(__file__)
+
+
+def _extract(html_content, parser=None):
+    amz = AmazonClient(parser=parser)
+    amz._update_headers("https://www.amazon.com/s?k=python")
+    amz._extract_page(html_content, max_product_nb=100)
+    return amz.product_dict_list
+
+
+@pytest.mark.parametrize("parser_name", sorted(PARSERS))
+def test_extract_page_regression(parser_name):
+    """search_mobile.json was recorded with the previous extraction code"""
+    try:
+        PARSERS[parser_name]()
+    except ImportError:
+        pytest.skip(f"{parser_name} is not installed")
+    with open(os.path.join(_TEST_DIR, "search_mobile.html")) as f:
+        products = _extract(f.read(), parser_name)
+    with open(os.path.join(_TEST_DIR, "search_mobile.json")) as f:
+        expected = json.load(f)
+
+    # repr() so that the NaN values compare equal
+    assert repr(products) == repr(expected)
+
+
+def test_extract_prices_with_thousands_separator():
+    product = _extract('<ul id="resultItems"><li>'
+                       '<span class="a-price"><span>$1,249.00</span></span>'
+                       '<span>($1,249.00/Count)</span></li></ul>')[0]
+
+    assert product["prices_main"] == 1249.0
+    assert product["prices_per_unit"] == 1249.0
+    assert product["units"] == "Count"
+    assert math.isnan(product["rating"])
@@ -0,0 +1,46 @@
+import logging
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.fields import FIELD_EXTRACTORS
+from amazonscraper.metrics import InMemorySink, LoggingSink, PrometheusSink
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.throttle import NoRateLimiter
+
+
+def _search(metrics, **server_kwargs):
+    with MockAmazonServer(page_nb=3, products_per_page=4, seed=1, **server_kwargs) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), metrics=metrics)
+        return amz._get_products(search_url=server.search_url("python"))
+
+
+def test_in_memory_sink():
+    sink = InMemorySink()
+    _search(sink, error_rate=0.3)
+    summary = sink.summary()
+
+    assert summary['page_seconds']['count'] == 3
+    assert summary['extract_page_seconds']['count'] == 3
+    assert sink.histogram('products_per_page').sum == 12
+    assert sink.histogram('request_seconds', answer='page').count == 3
+    assert summary['page_retries']['sum'] == sink.histogram('request_seconds', answer='throttled').count > 0
+    assert summary['response_bytes']['mean'] > 1000
+    for field in FIELD_EXTRACTORS:
+        assert sink.histogram('field_seconds', field=field).count == 12
+
+
+def test_prometheus_sink():
+    sink = PrometheusSink()
+    _search(sink)
+    exposition = sink.exposition()
+
+    assert exposition.count('# TYPE amazonscraper_field_seconds histogram') == 1
+    assert 'amazonscraper_request_seconds_count{answer="page"} 3\n' in exposition
+    assert 'amazonscraper_products_per_page_bucket{le="5"} 3\n' in exposition
+
+
+def test_logging_sink(caplog):
+    with caplog.at_level(logging.DEBUG, logger="amazonscraper.metrics"):
+        _search(LoggingSink())
+
+    assert any(message.startswith("field_seconds ") and message.endswith(" field=title")
+               for message in caplog.messages)
@@ -0,0 +1,44 @@
+import socket
+import struct
+
+import pytest
+
+from amazonscraper.client import CSS_SELECTORS, AmazonClient, LayoutCache
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.throttle import NoRateLimiter
+
+
+@pytest.mark.parametrize("layout", list(CSS_SELECTORS))
+def test_mock_server_pagination(layout):
+    with MockAmazonServer(layout=layout, page_nb=3, products_per_page=4) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), layout_cache=LayoutCache())
+        products = amz._get_products(search_url=server.search_url("python"), max_product_nb=100)
+
+    assert len(products) == 12
+    assert amz.layout_cache.hits[layout] == 3
+    assert products[-1]['asin'] == "B000000012"
+    assert products[0]['url'].startswith(server.url)
+    assert products[0]['review_nb'] == 37 and products[0]['prices_main'] == 6.25
+
+
+def test_mock_server_failure_injection():
+    with MockAmazonServer(page_nb=5, products_per_page=2, error_rate=0.2, robot_check_rate=0.1,
+                          sign_in_rate=0.1, seed=3) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter())
+        products = amz._get_products(search_url=server.search_url("python"), max_product_nb=100)
+
+    assert len(products) == 10
+    assert server.answers['page'] == 5
+    assert server.answers['error'] + server.answers['robot_check'] + server.answers['sign_in'] > 0
+
+
+def test_mock_server_ignores_aborted_connections(capfd):
+    with MockAmazonServer(products_per_page=2000) as server:
+        for _ in range(5):
+            with socket.create_connection(server._httpd.server_address[:2]) as connection:
+                connection.sendall(b"GET /s?k=python HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                connection.recv(1)
+                # Close with a reset, while the page is being sent
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+
+    assert "Traceback" not in capfd.readouterr().err
@@ -0,0 +1,38 @@
+import gc
+import os
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.pages import DiskHtmlPages, HtmlPages, get_html_pages
+
+
+def test_disk_html_pages(tmp_path):
+    pages = DiskHtmlPages(str(tmp_path))
+    assert pages.last == ""
+    for page_index in range(3):
+        pages.append(f"<html>page {page_index} é</html>")
+
+    assert len(pages) == 3
+    assert pages[0] == "<html>page 0 é</html>"
+    assert pages.last == "<html>page 2 é</html>"
+    assert list(pages)[1:] == pages[1:]
+    assert sorted(os.listdir(str(tmp_path)))[0] == "page_00000.html.gz"
+
+
+def test_disk_html_pages_temporary_directory():
+    amz = AmazonClient(keep_html_pages="disk")
+    amz.html_pages.append("<html></html>")
+    directory = amz.html_pages.directory
+    assert os.listdir(directory) == ["page_00000.html.gz"]
+
+    del amz
+    gc.collect()
+    assert not os.path.exists(directory)
+
+
+def test_html_pages_slice():
+    for pages in (HtmlPages(), get_html_pages(3), get_html_pages('none')):
+        for page_index in range(4):
+            pages.append(f"<html>page {page_index}</html>")
+
+        assert pages[-2:] == list(pages)[-2:]
+    assert pages.last == "<html>page 3</html>"
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.parsers import PARSERS, get_parser
+
+_TEST_DIR = os.path.dirname(__file__)
+
+
+def _extract(parser, file_name="search_mobile.html"):
+    amz = AmazonClient(parser=parser)
+    amz._update_headers("https://www.amazon.com/s?k=python")
+    with open(os.path.join(_TEST_DIR, file_name)) as f:
+        next_page_url = amz._extract_page(f.read(), max_product_nb=100)
+    # repr() so that the NaN values compare equal
+    return next_page_url, repr(amz.product_dict_list)
+
+
+@pytest.mark.parametrize("parser_name", sorted(PARSERS))
+def test_parsers_give_identical_products(parser_name):
+    try:
+        PARSERS[parser_name]()
+    except ImportError:
+        pytest.skip(f"{parser_name} is not installed")
+
+    next_page_url, products = _extract(parser_name)
+
+    assert next_page_url == "https://www.amazon.com/s?k=python&page=2"
+    assert (next_page_url, products) == _extract("beautifulsoup")
+    assert "'asin': 'B077Z55G3B'" in products
+
+
+def test_get_parser_falls_back_to_beautifulsoup(monkeypatch):
+    import amazonscraper.parsers
+    monkeypatch.setattr(amazonscraper.parsers, "LexborHTMLParser", None)
+
+    with pytest.warns(UserWarning, match="falling back to BeautifulSoup"):
+        parser = get_parser("selectolax")
+    assert parser.name == "beautifulsoup"
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.pipeline import ParsingPool, PipelinedAmazonClient
+
+_TEST_DIR = os.path.dirname(__file__)
+_SEARCH_URL = "https://www.amazon.com/s?k=python"
+
+
+class _OfflinePipelinedClient(PipelinedAmazonClient):
+    """PipelinedAmazonClient serving pages from a {url: html} dict"""
+    def __init__(self, pool, pages, **kwargs):
+        super().__init__(pool, **kwargs)
+        self.pages = pages
+        self.requested_urls = []
+
+    def _get_page_html(self, search_url):
+        self.requested_urls.append(search_url)
+        return self.pages[search_url]
+
+
+def _pages(page_nb):
+    with open(os.path.join(_TEST_DIR, "search_mobile.html")) as f:
+        page = f.read()
+    pages = {}
+    for page_index in range(1, page_nb + 1):
+        url = _SEARCH_URL if page_index == 1 else f"{_SEARCH_URL}&page={page_index}"
+        next_link = f'/s?k=python&amp;page={page_index + 1}'
+        pages[url] = page.replace('/s?k=python&amp;page=2">Next', f'{next_link}">Next')
+    # No next page link on the last page
+    pages[url] = pages[url].replace('<li class="a-last">', '<li class="a-disabled">')
+    return pages
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ParsingPool(workers=2, max_pending_pages=2) as pool:
+        yield pool
+
+
+def test_pipelined_client_same_products(pool):
+    amz = _OfflinePipelinedClient(pool, _pages(4))
+    products = amz._get_products(search_url=_SEARCH_URL, max_product_nb=100)
+
+    expected = AmazonClient()
+    expected._get_page_html = _OfflinePipelinedClient(pool, _pages(4))._get_page_html
+    assert repr(products) == repr(expected._get_products(search_url=_SEARCH_URL, max_product_nb=100))
+    assert len(products) == 12
+    assert len(amz.html_pages) == 4
+
+
+def test_pipelined_client_stops_at_max_product_nb(pool):
+    amz = _OfflinePipelinedClient(pool, _pages(4), lookahead=2)
+    products = amz._get_products(search_url=_SEARCH_URL, max_product_nb=4)
+
+    assert len(products) == 4
+    # The third page was downloaded ahead, but is not kept
+    assert len(amz.requested_urls) == 3
+    assert len(amz.html_pages) == 2
+
+
+def test_pipelined_client_wrong_guess(pool):
+    pages = _pages(2)
+    # The raw HTML pre-scan cannot find this link, the parser can
+    pages[_SEARCH_URL] = pages[_SEARCH_URL].replace('<li class="a-last">', '<li class="a-last" id="next">')
+    amz = _OfflinePipelinedClient(pool, pages)
+    products = amz._get_products(search_url=_SEARCH_URL, max_product_nb=100)
+
+    assert len(products) == 6
+    assert amz.requested_urls == [_SEARCH_URL, _SEARCH_URL + "&page=2"]
@@ -0,0 +1,43 @@
+import pickle
+import sys
+
+from amazonscraper import Product, Products
+
+_PRODUCT_DICT = {'title': 'Learning Python', 'rating': 4.5, 'review_nb': 1102, 'img': 'https://img/51R.jpg',
+                 'url': 'https://www.amazon.com/dp/1449355730', 'asin': '1449355730',
+                 'prices_per_unit': float('nan'), 'units': float('nan'), 'prices_main': 44.99}
+
+
+def test_product_fields():
+    product = Product(dict(_PRODUCT_DICT, badge='Best seller'))
+
+    assert product.title == 'Learning Python' and product.review_nb == 1102
+    assert product.badge == 'Best seller'
+    assert product.unknown == ""
+    assert list(product.product) == list(_PRODUCT_DICT) + ['badge']
+    product.title = 'Learning Python, 5th Edition'
+    assert product.product['title'] == 'Learning Python, 5th Edition'
+
+
+def test_product_dict_replaced():
+    product = Product(dict(_PRODUCT_DICT, badge='Best seller'))
+    product.product = {'title': 'Fluent Python'}
+
+    assert product.product == {'title': 'Fluent Python'}
+    assert product.rating == "" and product.badge == ""
+
+
+def test_product_without_instance_dict():
+    product = Product(_PRODUCT_DICT)
+
+    assert not hasattr(product, '__dict__')
+    assert sys.getsizeof(product) < sys.getsizeof(_PRODUCT_DICT)
+
+
+def test_product_pickle():
+    products = Products([_PRODUCT_DICT, {'title': 'Fluent Python'}])
+    unpickled = pickle.loads(pickle.dumps(products.products))
+
+    assert unpickled[0].asin == '1449355730'
+    assert unpickled[1].product == {'title': 'Fluent Python'}
+    assert unpickled[1].asin == ""
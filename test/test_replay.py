@@ -0,0 +1,74 @@
+import os
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from amazonscraper.client import AmazonClient
+from amazonscraper.replay import PageArchive, RecordingAdapter, ReplayAdapter
+from amazonscraper.throttle import NoRateLimiter
+
+_TEST_DIR = os.path.dirname(__file__)
+_SEARCH_URL = "https://www.amazon.com/s?k=python"
+
+
+class _FakeAdapter(BaseAdapter):
+    """requests transport adapter answering from a {url: [(status, html)]} dict"""
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = answers
+
+    def send(self, request, **kwargs):
+        status_code, text = self.answers[request.url].pop(0)
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = text.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def _page():
+    with open(os.path.join(_TEST_DIR, "search_mobile.html")) as f:
+        # No next page link
+        return f.read().replace('<li class="a-last">', '<li class="a-disabled">')
+
+
+def _record(archive):
+    amz = AmazonClient(rate_limiter=NoRateLimiter())
+    adapter = RecordingAdapter(archive, _FakeAdapter({_SEARCH_URL: [(503, "Busy"), (200, _page())]}))
+    amz.session.mount('https://', adapter)
+    return amz._get_products(search_url=_SEARCH_URL)
+
+
+def test_record_and_replay(tmpdir):
+    path = str(tmpdir.join("archive.jsonl.gz"))
+    recorded_products = _record(PageArchive(path))
+
+    archive = PageArchive(path)
+    assert len(archive) == 2
+    amz = AmazonClient(archive=archive, replay=True)
+    assert repr(amz._get_products(search_url=_SEARCH_URL)) == repr(recorded_products)
+    assert len(recorded_products) == 3
+
+
+def test_archive_rejects_streaming(tmpdir):
+    with pytest.raises(ValueError):
+        AmazonClient(archive=PageArchive(str(tmpdir.join("archive.jsonl.gz"))), streaming=True)
+
+
+def test_replay_order_and_missing_url(tmpdir):
+    archive = PageArchive(str(tmpdir.join("archive.jsonl.gz")))
+    archive.record(_SEARCH_URL, 503, {}, "Busy")
+    archive.record(_SEARCH_URL, 200, {'Content-Type': 'text/html'}, "<html>é</html>")
+    session = requests.session()
+    session.mount('https://', ReplayAdapter(archive))
+
+    assert session.get(_SEARCH_URL).status_code == 503
+    assert session.get("https://WWW.amazon.com/s?k=python").text == "<html>é</html>"
+    assert session.get(_SEARCH_URL).text == "<html>é</html>"
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get(_SEARCH_URL + "&page=2")
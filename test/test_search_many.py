@@ -0,0 +1,35 @@
+import amazonscraper
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.throttle import NoRateLimiter
+from amazonscraper.transport import Transport
+
+
+class _CountingTransport(Transport):
+    """Transport counting the requests"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.request_nb = 0
+
+    def request(self, method, url, **kwargs):
+        self.request_nb += 1
+        return super().request(method, url, **kwargs)
+
+
+def test_search_many():
+    with MockAmazonServer(page_nb=2, products_per_page=3) as server:
+        queries = [server.search_url(f"query {index}") for index in range(10)]
+        queries.append("http://127.0.0.1:1/s?k=unreachable")
+        transport = _CountingTransport(pool_maxsize=4)
+        results = list(amazonscraper.search_many(iter(queries), workers=4, transport=transport,
+                                                 rate_limiter=NoRateLimiter()))
+
+    assert sorted(result.query for result in results) == sorted(queries)
+    assert transport.request_nb == 10 * 2 + 1
+    for result in results:
+        if result.query.endswith("unreachable"):
+            assert isinstance(result.error, Exception) and len(result.products) == 0
+        else:
+            assert result.error is None
+            assert len(result.products) == 6
+            assert result.products[0].title.startswith(result.query.split("k=")[1].replace("+", " ").title())
+            assert len(result.products.html_pages) == 0
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import amazonscraper
+from amazonscraper.client import AmazonClient
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.throttle import NoRateLimiter
+
+
+class _StreamedResponse(object):
+    """Streamed requests response, counting the chunks read"""
+    status_code = 200
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read_chunk_nb = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read_chunk_nb += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_streaming_stops_at_robot_check():
+    response = _StreamedResponse([b"<html><title>Robot", b" Check</title>"] + [b"x" * 8192] * 100)
+    AmazonClient(streaming=True)._read_streamed(response)
+
+    assert response.read_chunk_nb == 2
+    assert response._content == b"<html><title>Robot Check</title>"
+    assert response.closed
+
+
+def test_streaming_reads_valid_pages():
+    chunks = [b"<html>"] + [b"x" * 8192] * 10 + [b"Robot Check</html>"]
+    response = _StreamedResponse(chunks)
+    AmazonClient(streaming=True)._read_streamed(response)
+
+    # The keywords are only looked for in the head of the page
+    assert response.read_chunk_nb == len(chunks)
+    assert response._content == b"".join(chunks)
+
+
+def test_streaming_search():
+    with MockAmazonServer(page_nb=3, products_per_page=3, robot_check_rate=0.3, seed=2) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), streaming=True)
+        products = amz._get_products(search_url=server.search_url("python"))
+
+    assert len(products) == 9
+    assert server.answers['robot_check'] > 0
+
+
+def test_streaming_asearch():
+    pytest.importorskip("aiohttp")
+
+    async def main(url):
+        async with amazonscraper.AsyncAmazonClient(rate_limiter=NoRateLimiter(), streaming=True) as amz:
+            return await amz._get_products(search_url=url)
+
+    with MockAmazonServer(page_nb=3, products_per_page=3, robot_check_rate=0.3, seed=2) as server:
+        products = asyncio.run(main(server.search_url("python")))
+
+    assert len(products) == 9
+    assert server.answers['robot_check'] > 0
@@ -0,0 +1,62 @@
+import pytest
+
+import amazonscraper.client
+from amazonscraper.client import AmazonClient
+from amazonscraper.throttle import RateLimiter, TokenBucket
+
+
+class _Response(object):
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+
+class _ScriptedSession(object):
+    """requests session whose answers are given in advance"""
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+    def get(self, url, headers):
+        return self.answers.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(amazonscraper.client.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_rate_limiter_adapts_to_throttling(sleeps):
+    rate_limiter = RateLimiter(rate=4, burst=100)
+    amz = AmazonClient(rate_limiter=rate_limiter)
+    amz.session = _ScriptedSession([_Response(200, "<title>Robot Check</title>"), _Response(503),
+                                    _Response(404), _Response(200, "<html>Results</html>")])
+    amz._update_headers("https://www.amazon.com/s?k=python")
+
+    assert amz._get_page_html("https://www.amazon.com/s?k=python") == "<html>Results</html>"
+    # Halved twice (Robot Check and 503, not 404), then increased once
+    assert rate_limiter.rate("www.amazon.com") == pytest.approx(1.1)
+    assert rate_limiter.rate("www.amazon.fr") == 4
+    # Exponential backoff between the trials
+    assert len(sleeps) == 3
+    assert 0.5 <= sleeps[0] <= 1 and 1 <= sleeps[1] <= 2 and 2 <= sleeps[2] <= 4
+
+
+def test_no_backoff_after_the_last_trial(sleeps):
+    amz = AmazonClient(rate_limiter=RateLimiter(rate=1000, burst=100))
+    amz.session = _ScriptedSession([_Response(404)] * amazonscraper.client._MAX_TRIAL_REQUESTS)
+    amz._update_headers("https://www.amazon.com/s?k=python")
+
+    with pytest.raises(ValueError):
+        amz._get_page_html("https://www.amazon.com/s?k=python")
+    assert len(sleeps) == amazonscraper.client._MAX_TRIAL_REQUESTS - 1
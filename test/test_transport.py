@@ -0,0 +1,79 @@
+import pytest
+import requests
+
+import amazonscraper
+from amazonscraper.client import AmazonClient
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.replay import PageArchive
+from amazonscraper.transport import HTTP2Transport, Transport
+
+
+def _connection_nb(transport_factory, search_nb=4):
+    with MockAmazonServer(page_nb=2, products_per_page=2) as server:
+        for index in range(search_nb):
+            products = amazonscraper.search(search_url=server.search_url(f"query {index}"),
+                                            transport=transport_factory())
+            assert len(products) == 4
+        return server.connection_nb
+
+
+def test_shared_transport_reuses_connections():
+    transport = Transport()
+    assert _connection_nb(lambda: transport) == 1
+    assert _connection_nb(lambda: None) == 4
+    assert _connection_nb(lambda: Transport(keep_alive=False)) == 8
+
+
+def test_transport_default_timeout():
+    transport = Transport(timeout=0.05)
+    with MockAmazonServer(latency=0.5) as server:
+        with pytest.raises(requests.exceptions.Timeout):
+            transport.get(server.search_url("python"))
+        assert transport.get(server.search_url("python"), timeout=5).status_code == 200
+
+
+def test_archive_leaves_shared_transport_untouched(tmpdir):
+    transport = Transport(pool_maxsize=3)
+    adapter = transport.get_adapter("http://")
+    archive = PageArchive(str(tmpdir.join("archive.jsonl.gz")))
+    with MockAmazonServer(page_nb=2, products_per_page=2) as server:
+        amazonscraper.search(search_url=server.search_url("python"), transport=transport, archive=archive)
+        assert len(archive) == 2
+        amazonscraper.search(search_url=server.search_url("rust"), transport=transport)
+        replayed = amazonscraper.search(search_url=server.search_url("python"), transport=transport,
+                                        archive=archive, replay=True)
+        assert server.connection_nb == 1
+
+    assert len(PageArchive(archive.path)) == 2
+    assert transport.get_adapter("http://") is adapter
+    assert len(replayed) == 4
+
+
+def test_http2_transport_same_products():
+    pytest.importorskip("httpx")
+    with HTTP2Transport() as transport, MockAmazonServer(page_nb=2, products_per_page=3) as server:
+        products = amazonscraper.search(search_url=server.search_url("python"), transport=transport)
+        expected = amazonscraper.search(search_url=server.search_url("python"))
+
+    assert len(products) == 6
+    assert [product.asin for product in products] == [product.asin for product in expected]
+    # The mock server only speaks HTTP/1.1
+    assert server.connection_nb == 2
+
+
+def test_http2_transport_errors():
+    pytest.importorskip("httpx")
+    with HTTP2Transport(timeout=0.05) as transport, MockAmazonServer(latency=0.5) as server:
+        with pytest.raises(requests.exceptions.Timeout):
+            transport.get(server.search_url("python"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        HTTP2Transport().get("http://127.0.0.1:1/")
+
+
+def test_http2_transport_unsupported_options(tmpdir):
+    pytest.importorskip("httpx")
+    with HTTP2Transport() as transport:
+        with pytest.raises(ValueError):
+            AmazonClient(session=transport, streaming=True)
+        with pytest.raises(ValueError):
+            AmazonClient(session=transport, archive=PageArchive(str(tmpdir.join("archive.jsonl.gz"))))
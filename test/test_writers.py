@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import amazonscraper
+from amazonscraper import CSVWriter, JSONLinesWriter, Products
+from amazonscraper.checkpoint import Checkpoint
+from amazonscraper.client import AmazonClient
+from amazonscraper.mockserver import MockAmazonServer
+from amazonscraper.throttle import NoRateLimiter
+
+
+class _CountingWriter(JSONLinesWriter):
+    """JSONLinesWriter recording the number of products written at each flush"""
+    def __init__(self, file):
+        super().__init__(file)
+        self.flushed_product_nbs = []
+
+    def write_page(self, product_dict_list):
+        super().write_page(product_dict_list)
+        self.flushed_product_nbs.append(self.product_nb)
+
+
+def test_search_writes_each_page():
+    output = io.StringIO()
+    writer = _CountingWriter(output)
+    with MockAmazonServer(page_nb=3, products_per_page=4) as server:
+        amz = AmazonClient(rate_limiter=NoRateLimiter(), writer=writer)
+        product_dict_list = amz._get_products(search_url=server.search_url("python"), max_product_nb=10)
+
+    assert writer.flushed_product_nbs == [4, 8, 10]
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [line['asin'] for line in lines] == [product_dict['asin'] for product_dict in product_dict_list]
+
+
+def test_iter_search_writes_csv(tmpdir):
+    path = str(tmpdir.join("python.csv"))
+    with MockAmazonServer(page_nb=2, products_per_page=3) as server, CSVWriter(path, separator=";") as writer:
+        products = list(amazonscraper.iter_search(search_url=server.search_url("python"), writer=writer))
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0].split(";")[:3] == ['title', 'rating', 'review_nb']
+    assert [line.split(";")[5] for line in lines[1:]] == [product.asin for product in products]
+
+
+def test_failed_search_leaves_partial_output(tmpdir):
+    path = str(tmpdir.join("python.jsonl"))
+    checkpoint = Checkpoint(str(tmpdir.join("python.checkpoint")))
+    with MockAmazonServer(page_nb=3, products_per_page=2) as server:
+        with JSONLinesWriter(path) as writer:
+            amz = AmazonClient(rate_limiter=NoRateLimiter(), writer=writer, checkpoint=checkpoint)
+            amz._get_products(search_url=server.search_url("python"), max_product_nb=4)
+        with open(path) as f:
+            assert len(f.readlines()) == 4
+
+        # Resumed from the checkpoint: the output holds all the products again
+        with JSONLinesWriter(path) as writer:
+            amz = AmazonClient(rate_limiter=NoRateLimiter(), writer=writer, checkpoint=checkpoint)
+            amz._get_products(search_url=server.search_url("python"), max_product_nb=6)
+        with open(path) as f:
+            assert len(f.readlines()) == 6
+
+
+def test_products_csv(tmpdir):
+    products = Products([{'title': 'Book title', 'rating': 4.2}, {'title': 'Book title 2', 'badge': 'New'}])
+    path = str(tmpdir.join("products.csv"))
+    products.csv(path)
+
+    with open(path) as f:
+        assert f.read() == 'title,rating\nBook title,4.2\nBook title 2,\n'
+    products.jsonl(path)
+    with open(path) as f:
+        assert json.loads(f.readlines()[1]) == {'title': 'Book title 2', 'badge': 'New'}
+
+
+@pytest.mark.parametrize("outputformat", ["csv", "jsonl"])
+def test_amazon2csv_prints_products(outputformat, amazon2csv):
+    with MockAmazonServer(page_nb=2, products_per_page=2) as server:
+        result = CliRunner().invoke(amazon2csv.main, ['--url', server.search_url("python"),
+                                                      '--outputformat', outputformat])
+    assert result.exit_code == 0, result.output
+    assert len(result.stdout.splitlines()) == (5 if outputformat == "csv" else 4)
+    assert "None" not in result.stdout